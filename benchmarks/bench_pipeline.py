@@ -0,0 +1,264 @@
+"""
+Benchmark of the local pipeline stages on synthetic developers.events feeds:
+fetch_and_clean (served over HTTP from a local directory) and merge_and_save.
+
+The generator writes realistic all-events.json / all-cfps.json payloads: tags,
+single-day / two-day / missing date ranges, and CFP hyperlinks that differ from the
+event's (utm params, trailing slash, scheme/host case, or no hyperlink at all).
+
+  python -m benchmarks.bench_pipeline                          # 10k, 100k records
+  python -m benchmarks.bench_pipeline --sizes 10000,1000000 --json bench_pipeline.json
+  python -m benchmarks.bench_pipeline --sizes 100000 --db-suffix .sqlite
+
+Peak memory is the tracemalloc peak of Python allocations during each stage;
+max_rss_mb is the process high-water mark (resource.getrusage) after it.
+tracemalloc slows allocation-heavy code down; use --no-tracemalloc for timings only.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts import feed_cache, fetch_data, merge_diff
+
+DEFAULT_SIZES = (10_000, 100_000)
+DAY_MS = 86_400_000
+
+TOPICS = ("databases", "cloud", "devops", "ai", "security", "data", "open-source", "kubernetes",
+          "java", "python", "javascript", "mysql", "postgresql", "mongodb", "observability")
+LANGUAGES = ("english", "german", "french", "spanish", "portuguese", "japanese")
+PLACES = (("Berlin", "Germany"), ("Paris", "France"), ("Austin, TX", "USA"), ("Bengaluru", "India"),
+          ("São Paulo", "Brazil"), ("Tokyo", "Japan"), ("Kraków", "Poland"), ("Online", "Online"))
+PREFIXES = ("DevFest", "KubeCon", "Data", "Open Source", "PG", "Cloud Native", "DevOpsDays", "AI")
+
+
+def _url_variant(url, rng):
+    """A URL that normalizes like `url` but is not byte-identical (or the same URL)."""
+    choice = rng.random()
+    if choice < 0.15:
+        return url + "/"
+    if choice < 0.25:
+        return url + "?utm_source=developers.events&utm_medium=feed"
+    if choice < 0.30:
+        return url.replace("https://", "HTTPS://").replace(".org", ".ORG")
+    if choice < 0.35:
+        return url + "#cfp"
+    return url
+
+
+def generate_records(count, seed=0, open_ratio=0.6, now_ms=None):
+    """
+    Yield (event, cfp) pairs; cfp is None for events without a CFP (about 1 in 5).
+    CFPs close in the future with probability open_ratio.
+    """
+    rng = random.Random(seed)
+    now_ms = now_ms or int(datetime.now(timezone.utc).timestamp() * 1000)
+    for i in range(count):
+        city, country = rng.choice(PLACES)
+        name = f"{rng.choice(PREFIXES)} {city.split(',')[0]} {2025 + i % 3} #{i}"
+        url = f"https://conf{i}.example.org" + ("/" + str(2025 + i % 3) if i % 4 == 0 else "")
+        start = now_ms + rng.randint(-60, 400) * DAY_MS
+        shape = rng.random()
+        if shape < 0.5:
+            date = [start]
+        elif shape < 0.95:
+            date = [start, start + rng.randint(1, 3) * DAY_MS]
+        else:
+            date = []
+        tags = [{"key": "topic", "value": t} for t in rng.sample(TOPICS, rng.randint(0, 4))]
+        tags.append({"key": "language", "value": rng.choice(LANGUAGES)})
+        location = "Online" if city == "Online" else f"{city} ({country})"
+        event = {
+            "name": name,
+            "hyperlink": url,
+            "date": date,
+            "city": city,
+            "country": country,
+            "location": location,
+            "tags": tags,
+            "misc": "",
+        }
+        cfp = None
+        if rng.random() < 0.8:
+            conf_date = date if rng.random() < 0.9 else date[:1]
+            conf = {"name": name, "hyperlink": _url_variant(url, rng), "date": conf_date, "location": location}
+            if date and rng.random() < 0.05:
+                # only joinable by name + start day
+                del conf["hyperlink"]
+            if rng.random() < 0.1:
+                conf["name"] = name.upper() + " "
+            open_cfp = rng.random() < open_ratio
+            until = now_ms + rng.randint(1, 120) * DAY_MS if open_cfp else now_ms - rng.randint(1, 365) * DAY_MS
+            cfp = {"link": f"{url}/cfp", "untilDate": until, "conf": conf}
+        yield event, cfp
+
+
+def write_feeds(directory, count, seed=0, open_ratio=0.6):
+    """Write all-events.json and all-cfps.json to `directory`, streaming; returns the CFP count."""
+    os.makedirs(directory, exist_ok=True)
+    cfp_count = 0
+    with open(os.path.join(directory, "all-events.json"), "w", encoding="utf-8") as ev_f, \
+            open(os.path.join(directory, "all-cfps.json"), "w", encoding="utf-8") as cfp_f:
+        ev_f.write("[")
+        cfp_f.write("[")
+        for i, (event, cfp) in enumerate(generate_records(count, seed, open_ratio)):
+            if i:
+                ev_f.write(",\n")
+            ev_f.write(json.dumps(event, ensure_ascii=False))
+            if cfp is not None:
+                if cfp_count:
+                    cfp_f.write(",\n")
+                cfp_f.write(json.dumps(cfp, ensure_ascii=False))
+                cfp_count += 1
+        ev_f.write("]")
+        cfp_f.write("]")
+    return cfp_count
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_directory(directory):
+    """Serve `directory` over HTTP on a daemon thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+TRACE_MEMORY = True
+
+
+def measure(fn, records):
+    """Run fn() (under tracemalloc unless disabled); returns (result, metrics) with records/s."""
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if TRACE_MEMORY else None
+    finally:
+        if TRACE_MEMORY:
+            tracemalloc.stop()
+    return result, {
+        "seconds": elapsed,
+        "records": records,
+        "records_per_s": records / elapsed if elapsed else None,
+        "peak_mb": peak / (1024 * 1024) if peak is not None else None,
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+
+def run_case(size, args, workdir):
+    feed_dir = os.path.join(workdir, f"feeds-{size}")
+    started = time.perf_counter()
+    cfp_count = write_feeds(feed_dir, size, seed=args.seed, open_ratio=args.open_ratio)
+    generate_s = time.perf_counter() - started
+    feed_bytes = sum(os.path.getsize(os.path.join(feed_dir, n)) for n in os.listdir(feed_dir))
+
+    server, base_url = serve_directory(feed_dir)
+    fetch_data.EVENTS_URL = f"{base_url}/all-events.json"
+    fetch_data.CFPS_URL = f"{base_url}/all-cfps.json"
+    feed_cache.CACHE_DIR = os.path.join(workdir, f"cache-{size}")
+    db_path = os.path.join(workdir, f"db-{size}", "events" + args.db_suffix)
+    stages = {}
+    try:
+        join_stats = {}
+        cleaned, stages["fetch_and_clean"] = measure(
+            lambda: fetch_data.fetch_and_clean(join_stats=join_stats), size)
+        stages["fetch_and_clean"]["join"] = join_stats
+        _, stages["fetch_and_clean_offline"] = measure(lambda: fetch_data.fetch_and_clean(offline=True), size)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # First merge inserts everything; the second replays the same feed (no-op updates)
+    result, stages["merge_initial"] = measure(lambda: merge_diff.merge_and_save(cleaned, db_path), len(cleaned))
+    stages["merge_initial"]["added"] = len(result["added"])
+    result, stages["merge_repeat"] = measure(lambda: merge_diff.merge_and_save(cleaned, db_path), len(cleaned))
+    stages["merge_repeat"]["updated"] = len(result["updated"])
+    return {
+        "records": size,
+        "cfps": cfp_count,
+        "open_cfps": len(cleaned),
+        "feed_mb": feed_bytes / (1024 * 1024),
+        "generate_s": generate_s,
+        "stages": stages,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def print_report(results):
+    cols = [("records", 9), ("stage", 24), ("seconds", 9), ("rec/s", 11), ("peak MB", 9), ("max RSS MB", 10)]
+    print(" | ".join(h.ljust(w) for h, w in cols))
+    print("-+-".join("-" * w for _, w in cols))
+    for r in results:
+        for stage, m in r["stages"].items():
+            cells = [str(r["records"]), stage, f"{m['seconds']:.2f}", f"{m['records_per_s'] or 0:,.0f}",
+                     f"{m['peak_mb']:.1f}" if m["peak_mb"] is not None else "-", f"{m['max_rss_mb'] or 0:.0f}"]
+            print(" | ".join(c.ljust(w) for c, (_, w) in zip(cells, cols)).rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch_and_clean and merge_and_save on synthetic feeds.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated all-events record counts (10k to 1M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--open-ratio", type=float, default=0.6, help="Fraction of CFPs still open")
+    parser.add_argument("--db-suffix", default=".json", help="DB file suffix (.json or .sqlite)")
+    parser.add_argument("--workdir", default=None, help="Keep generated feeds and DBs here (default: temp dir)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip peak-memory tracing (faster, timings only)")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    global TRACE_MEMORY
+    TRACE_MEMORY = not args.no_tracemalloc
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="cfp-bench-")
+    try:
+        results = [run_case(int(s), args, workdir) for s in args.sizes.split(",") if s.strip()]
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+End-to-end benchmark of scripts/sync_notion.py against the local fake Notion server.
+
+For each database size it seeds synthetic pages, builds a matching event list
+(some changed, some new, some missing) and times the snapshot, upsert_events and
+reconcile_missing phases, reporting wall time, request count and p50/p99 latency.
+
+  python -m benchmarks.bench_sync                       # 1k, 10k, 50k pages
+  python -m benchmarks.bench_sync --sizes 1000 --latency 0.05 --rate-429 0.02 --rps 50
+  python -m benchmarks.bench_sync --json bench_sync.json
+  python -m benchmarks.bench_sync --sizes 1000 --latency 0.05 --async   # scripts/notion_async.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fake_notion import DATABASE_ID, FakeNotion, seed_pages, serve
+from scripts import notion_async, sync_notion
+from scripts.notion_config import CONFIG
+
+DEFAULT_SIZES = (1_000, 10_000, 50_000)
+
+
+def _epoch_ms(iso_date):
+    return int(datetime.strptime(iso_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def make_events(page_count, changed=0.05, new=0.05, missing=0.05, seed=0):
+    """
+    Events mirroring the seeded developers.events pages:
+    `changed` get a new CFP date, `missing` are dropped (reconcile closes them),
+    and `new` * page_count events have no page yet.
+    """
+    rng = random.Random(seed)
+    events = []
+    for i in range(page_count):
+        if i % 20 == 19:
+            # team-managed page, never in the feed
+            continue
+        if rng.random() < missing:
+            continue
+        day = 1 + i % 28
+        cfp_day = day if rng.random() >= changed else 1 + (day % 28)
+        events.append({
+            "name": f"Conf {i}",
+            "hyperlink": f"https://conf{i}.example.org",
+            "cfp_url": f"https://conf{i}.example.org/cfp",
+            "cfp_close": _epoch_ms(f"2030-01-{cfp_day:02d}"),
+            "event_start": _epoch_ms(f"2030-03-{day:02d}"),
+            "location": "Berlin (Germany)",
+            "source": "developers.events",
+            "source_tags": [{"key": "topic", "value": "databases"}],
+            "external_id": f"developers-events::https-conf{i}-example-org::{_epoch_ms(f'2030-03-{day:02d}')}",
+        })
+    for j in range(int(page_count * new)):
+        events.append({
+            "name": f"New Conf {j}",
+            "hyperlink": f"https://new{j}.example.org",
+            "cfp_close": _epoch_ms("2030-02-01"),
+            "event_start": _epoch_ms("2030-04-01"),
+            "location": "Remote",
+            "source": "developers.events",
+            "source_tags": [],
+            "external_id": f"developers-events::https-new{j}-example-org::{_epoch_ms('2030-04-01')}",
+        })
+    return events
+
+
+def _phase(fake, fn):
+    fake.reset_log()
+    started = time.perf_counter()
+    result = fn()
+    stats = fake.stats()
+    stats["wall_s"] = time.perf_counter() - started
+    return result, stats
+
+
+def run_case(size, args):
+    fake = FakeNotion(latency=args.latency, jitter=args.jitter, rate_429=args.rate_429)
+    seed_pages(fake, size)
+    server, base_url = serve(fake)
+    CONFIG.base_url = base_url
+    CONFIG.api_token = "bench"
+    CONFIG.database_id = DATABASE_ID
+    sync_notion.invalidate_schema_cache()
+    try:
+        events = make_events(size)
+        keys = {sync_notion.normalize_url(e["hyperlink"]) for e in events}
+        if args.use_async:
+            index, snap = _phase(fake, lambda: asyncio.run(notion_async.build_page_index(rps=args.rps)))
+            upsert, ups = _phase(fake, lambda: asyncio.run(notion_async.upsert_events(
+                events, None, False, args.rps, index=index, concurrency=args.concurrency,
+            )))
+            rec, recs = _phase(fake, lambda: asyncio.run(notion_async.reconcile_missing(
+                keys, False, args.rps, False, concurrency=args.concurrency,
+            )))
+        else:
+            index, snap = _phase(fake, lambda: sync_notion.build_page_index(rps=args.rps))
+            upsert, ups = _phase(fake, lambda: sync_notion.upsert_events(
+                events, None, False, args.rps,
+                index=index if args.lookup == "snapshot" else None,
+                concurrency=args.concurrency,
+            ))
+            rec, recs = _phase(fake, lambda: sync_notion.reconcile_missing(
+                keys, False, args.rps, False, concurrency=args.concurrency,
+            ))
+    finally:
+        notion_async.close()
+        server.shutdown()
+        server.server_close()
+    return {
+        "pages": size,
+        "events": len(events),
+        "snapshot": snap,
+        "upsert": dict(ups, created=upsert["created"], updated=upsert["updated"], unchanged=upsert["unchanged"]),
+        "reconcile": dict(recs, scanned=rec["scanned"], affected=rec["affected"]),
+    }
+
+
+def print_report(results):
+    cols = [("pages", 8), ("phase", 10), ("wall s", 9), ("requests", 9), ("p50 ms", 8), ("p99 ms", 8), ("result", 40)]
+    print(" | ".join(h.ljust(w) for h, w in cols))
+    print("-+-".join("-" * w for _, w in cols))
+    for r in results:
+        for phase in ("snapshot", "upsert", "reconcile"):
+            s = r[phase]
+            if phase == "upsert":
+                detail = f"created={s['created']} updated={s['updated']} unchanged={s['unchanged']}"
+            elif phase == "reconcile":
+                detail = f"scanned={s['scanned']} closed={s['affected']}"
+            else:
+                detail = f"events={r['events']}"
+            cells = [str(r["pages"]), phase, f"{s['wall_s']:.2f}", str(s["requests"]),
+                     f"{s['p50'] * 1000:.1f}", f"{s['p99'] * 1000:.1f}", detail]
+            print(" | ".join(c.ljust(w) for c, (_, w) in zip(cells, cols)).rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync_notion against a local fake Notion API.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated page counts")
+    parser.add_argument("--rps", type=float, default=1000.0, help="Client rate limit (requests per second)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--lookup", choices=("snapshot", "query"), default="snapshot")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Benchmark scripts/notion_async.py (snapshot lookup)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random server latency, up to this many seconds")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = [run_case(int(s), args) for s in args.sizes.split(",") if s.strip()]
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Local stand-in for the parts of the Notion API used by scripts/sync_notion.py:
+  GET/PATCH /v1/databases/{id}, POST /v1/databases/{id}/query (filters + cursors),
+  POST /v1/pages, GET/PATCH /v1/pages/{id}
+Latency and 429 responses can be injected to exercise the client's rate limiting.
+
+Run standalone:
+  python -m benchmarks.fake_notion --port 8787 --pages 1000
+  NOTION_BASE_URL=http://127.0.0.1:8787/v1 NOTION_API_TOKEN=x NOTION_DATABASE_ID=bench \\
+      python -m scripts.sync_notion --dry-run
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+DATABASE_ID = "bench"
+
+SCHEMA = {
+    "Name": {"id": "title", "type": "title"},
+    "URL": {"id": "p-url", "type": "url"},
+    "CFP URL": {"id": "p-cfpurl", "type": "url"},
+    "CFP Dates": {"id": "p-cfpdates", "type": "date"},
+    "Date": {"id": "p-date", "type": "date"},
+    "Event Location": {"id": "p-loc", "type": "rich_text"},
+    "Technology": {"id": "p-tech", "type": "multi_select"},
+    "[CFP] Status": {"id": "p-status", "type": "status"},
+    "[CFP] Source": {"id": "p-source", "type": "select"},
+}
+
+
+class FakeNotion:
+    """In-memory database plus request log; shared by all handler threads."""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, retry_after=0.05, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.schema = json.loads(json.dumps(SCHEMA))
+        self.pages = {}
+        self.order = []
+        self.log = []
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        # Filtered result lists keyed by filter, valid until the next write
+        self._version = 0
+        self._filtered = {}
+
+    # -- data -------------------------------------------------------------
+    def add_page(self, properties, page_id=None):
+        page_id = page_id or str(uuid.uuid4())
+        page = {"object": "page", "id": page_id, "archived": False, "properties": _stored(properties, self.schema)}
+        with self.lock:
+            self.pages[page_id] = page
+            self.order.append(page_id)
+            self._version += 1
+        return page
+
+    def update_page(self, page_id, body):
+        with self.lock:
+            page = self.pages[page_id]
+            if "archived" in body:
+                page["archived"] = bool(body["archived"])
+            page["properties"].update(_stored(body.get("properties"), self.schema))
+            self._version += 1
+        return page
+
+    def reset_log(self):
+        with self.lock:
+            self.log = []
+
+    def record(self, method, endpoint, status, elapsed):
+        with self.lock:
+            self.log.append((method, endpoint, status, elapsed))
+
+    def stats(self):
+        """Request count by endpoint and latency percentiles (seconds) of the current log."""
+        with self.lock:
+            log = list(self.log)
+        by_endpoint = {}
+        for method, endpoint, status, _ in log:
+            key = f"{method} {endpoint}" + (" 429" if status == 429 else "")
+            by_endpoint[key] = by_endpoint.get(key, 0) + 1
+        latencies = sorted(e for *_, e in log)
+        return {
+            "requests": len(log),
+            "by_endpoint": by_endpoint,
+            "p50": _percentile(latencies, 50),
+            "p99": _percentile(latencies, 99),
+        }
+
+    # -- queries ----------------------------------------------------------
+    def query(self, body, filter_ids=None):
+        flt = body.get("filter")
+        with self.lock:
+            key = (json.dumps(flt, sort_keys=True), self._version)
+            pages = self._filtered.get(key)
+            if pages is None:
+                pages = [self.pages[pid] for pid in self.order if not self.pages[pid]["archived"]]
+                if flt:
+                    pages = [p for p in pages if _matches(p, flt)]
+                self._filtered = {key: pages}
+        start = int(body.get("start_cursor") or 0)
+        size = min(int(body.get("page_size") or 100), 100)
+        chunk = pages[start:start + size]
+        if filter_ids:
+            chunk = [_project(p, filter_ids, self.schema) for p in chunk]
+        has_more = start + size < len(pages)
+        return {
+            "object": "list",
+            "results": chunk,
+            "has_more": has_more,
+            "next_cursor": str(start + size) if has_more else None,
+        }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def _stored(properties, schema):
+    """Shape request property values like Notion returns them (types, plain_text, date.end)."""
+    out = {}
+    for name, value in (properties or {}).items():
+        value = json.loads(json.dumps(value))
+        for key in ("title", "rich_text"):
+            for t in value.get(key) or []:
+                t.setdefault("plain_text", (t.get("text") or {}).get("content", ""))
+        if isinstance(value.get("date"), dict):
+            value["date"].setdefault("end", None)
+        ptype = (schema.get(name) or {}).get("type") or next(iter(value), None)
+        value["type"] = ptype
+        value["id"] = (schema.get(name) or {}).get("id", name)
+        out[name] = value
+    return out
+
+
+def _project(page, filter_ids, schema):
+    names = {name for name, prop in schema.items() if prop.get("id") in filter_ids}
+    projected = dict(page)
+    projected["properties"] = {k: v for k, v in page["properties"].items() if k in names}
+    return projected
+
+
+def _plain(value):
+    if not isinstance(value, dict):
+        return None
+    ptype = value.get("type")
+    if ptype in ("title", "rich_text"):
+        return "".join(t.get("plain_text", "") for t in value.get(ptype) or [])
+    if ptype == "url":
+        return value.get("url")
+    if ptype == "date":
+        return (value.get("date") or {}).get("start")
+    if ptype in ("select", "status"):
+        return (value.get(ptype) or {}).get("name")
+    return None
+
+
+def _matches(page, flt):
+    if "and" in flt:
+        return all(_matches(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(_matches(page, f) for f in flt["or"])
+    actual = _plain(page["properties"].get(flt.get("property")))
+    cond = next((v for k, v in flt.items() if k != "property"), {}) or {}
+    if "equals" in cond:
+        return actual == cond["equals"]
+    if "does_not_equal" in cond:
+        return actual != cond["does_not_equal"]
+    if "is_empty" in cond:
+        return not actual
+    if "is_not_empty" in cond:
+        return bool(actual)
+    return True
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, payload, headers=None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+            return status
+
+        def _body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+        def _dispatch(self, method):
+            started = time.perf_counter()
+            path, _, query = self.path.partition("?")
+            parts = path.strip("/").split("/")
+            body = self._body() if method in ("POST", "PATCH") else {}
+            endpoint = "/".join(p if i < 2 else "{id}" for i, p in enumerate(parts[:3]))
+            if len(parts) == 4:
+                endpoint += "/" + parts[3]
+            delay = fake.latency + (fake.random.uniform(0, fake.jitter) if fake.jitter else 0.0)
+            if delay:
+                time.sleep(delay)
+            if fake.rate_429 and fake.random.random() < fake.rate_429:
+                status = self._reply(429, {"object": "error", "code": "rate_limited"},
+                                     {"Retry-After": str(fake.retry_after)})
+            else:
+                status = self._route(method, parts, body, query)
+            fake.record(method, endpoint, status, time.perf_counter() - started)
+
+        def _route(self, method, parts, body, query):
+            if len(parts) < 2 or parts[0] != "v1":
+                return self._reply(404, {"object": "error", "code": "object_not_found"})
+            kind = parts[1]
+            if kind == "databases" and len(parts) == 3 and method == "GET":
+                return self._reply(200, {"object": "database", "id": parts[2], "properties": fake.schema})
+            if kind == "databases" and len(parts) == 3 and method == "PATCH":
+                for name, spec in (body.get("properties") or {}).items():
+                    fake.schema[name] = {"id": f"p-{len(fake.schema)}", "type": next(iter(spec))}
+                return self._reply(200, {"object": "database", "id": parts[2], "properties": fake.schema})
+            if kind == "databases" and len(parts) == 4 and parts[3] == "query" and method == "POST":
+                filter_ids = [v for k, v in parse_qsl(query or "") if k == "filter_properties"]
+                return self._reply(200, fake.query(body, filter_ids))
+            if kind == "pages" and len(parts) == 2 and method == "POST":
+                return self._reply(200, fake.add_page(body.get("properties")))
+            if kind == "pages" and len(parts) == 3:
+                page = fake.pages.get(parts[2])
+                if page is None:
+                    return self._reply(404, {"object": "error", "code": "object_not_found"})
+                if method == "PATCH":
+                    page = fake.update_page(parts[2], body)
+                return self._reply(200, page)
+            return self._reply(400, {"object": "error", "code": "invalid_request"})
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+    return Handler
+
+
+def page_properties(i, source="developers.events", status="Open"):
+    """Properties of the i-th synthetic developers.events page."""
+    day = 1 + i % 28
+    return {
+        "Name": {"title": [{"text": {"content": f"Conf {i}"}}]},
+        "URL": {"url": f"https://conf{i}.example.org"},
+        "CFP URL": {"url": f"https://conf{i}.example.org/cfp"},
+        "CFP Dates": {"date": {"start": f"2030-01-{day:02d}"}},
+        "Date": {"date": {"start": f"2030-03-{day:02d}", "end": None}},
+        "Event Location": {"rich_text": [{"text": {"content": "Berlin (Germany)"}}]},
+        "Technology": {"multi_select": [{"name": "databases"}]},
+        "[CFP] Status": {"status": {"name": status}},
+        "[CFP] Source": {"select": {"name": source}},
+    }
+
+
+def seed_pages(fake, count):
+    """Fill the fake database with `count` pages; every 20th is team-managed (not developers.events)."""
+    for i in range(count):
+        source = "team" if i % 20 == 19 else "developers.events"
+        fake.add_page(page_properties(i, source=source), page_id=f"page-{i:06d}")
+
+
+def serve(fake, host="127.0.0.1", port=0):
+    """Start the server on a daemon thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Notion API.")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--pages", type=int, default=0, help="Seed the database with N synthetic pages")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    fake = FakeNotion(latency=args.latency, jitter=args.jitter, rate_429=args.rate_429)
+    seed_pages(fake, args.pages)
+    server, base_url = serve(fake, port=args.port)
+    print(f"Fake Notion at {base_url} (database id: {DATABASE_ID}, pages: {len(fake.pages)})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
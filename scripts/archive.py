@@ -0,0 +1,60 @@
+import os, json, gzip, glob
+from datetime import datetime, timezone
+
+# Closed records leave the hot DB and are appended to year-partitioned archives:
+#   data/archive/percona_events-2025.jsonl.gz
+ARCHIVE_DIRNAME = "archive"
+
+
+def archive_dir(db_path):
+    return os.path.join(os.path.dirname(db_path) or ".", ARCHIVE_DIRNAME)
+
+
+def _stem(db_path):
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def _partition_year(ev):
+    """Year the CFP closed; falls back to the last update for records without cfp_close."""
+    value = ev.get("cfp_close")
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).year
+    stamp = ev.get("updated_at") or ev.get("created_at") or ""
+    return int(stamp[:4]) if stamp[:4].isdigit() else datetime.now(timezone.utc).year
+
+
+def archive_path(db_path, year):
+    return os.path.join(archive_dir(db_path), f"{_stem(db_path)}-{year}.jsonl.gz")
+
+
+def append_records(db_path, records):
+    """
+    Append closed records to their yearly archive (one JSON object per line, gzip).
+    Each call adds a new gzip member, which gzip readers treat as one stream.
+    """
+    by_year = {}
+    for ev in records:
+        by_year.setdefault(_partition_year(ev), []).append(ev)
+    for year, items in sorted(by_year.items()):
+        path = archive_path(db_path, year)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for ev in items:
+                f.write(json.dumps(ev, ensure_ascii=False, sort_keys=True))
+                f.write("\n")
+    return len(records)
+
+
+def iter_archived(db_path, years=None):
+    """Yield archived records, oldest partition first (optionally only the given years)."""
+    pattern = os.path.join(archive_dir(db_path), f"{_stem(db_path)}-*.jsonl.gz")
+    for path in sorted(glob.glob(pattern)):
+        year = path[: -len(".jsonl.gz")].rsplit("-", 1)[-1]
+        if years is not None and (not year.isdigit() or int(year) not in years):
+            continue
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
@@ -0,0 +1,200 @@
+"""
+Compact column-oriented copy of the event DB for large histories and reports.
+
+Each event dict (~18 keys, nested source_tags dicts, repeated dates and countries) becomes
+one row across typed columns:
+  - epoch ms fields in array('q'); the *_date mirrors are derived from them, not stored
+  - source / country / city / closed_reason interned to integer ids in array('i')
+  - source_tags interned as (key, value) pairs, stored as a flat id array plus row offsets
+  - every other field in a plain per-field list
+Key order per row is kept as an interned "shape", so to_dict() returns exactly the
+original dict (values that do not fit their column are kept verbatim on the side).
+"""
+from array import array
+
+from scripts.normalize import to_date_str
+
+EPOCH_FIELDS = ("cfp_close", "event_start", "event_end")
+MIRROR_FIELDS = {f"{f}_date": f for f in EPOCH_FIELDS}
+INTERNED_FIELDS = ("source", "country", "city", "closed_reason")
+TAGS_FIELD = "source_tags"
+
+NULL = -(2 ** 63)  # missing / None epoch
+_MISSING = object()
+
+
+class Interner:
+    """Bidirectional value <-> small int mapping."""
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def intern(self, value):
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def get(self, value):
+        return self.ids.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _is_epoch(value):
+    return type(value) is int and NULL < value < 2 ** 63
+
+
+def _tag_pairs(tags):
+    """[(key, value), ...] for a well-formed source_tags list, else None."""
+    if not isinstance(tags, list):
+        return None
+    pairs = []
+    for t in tags:
+        if type(t) is not dict or list(t) != ["key", "value"]:
+            return None
+        if not isinstance(t["key"], str) or not isinstance(t["value"], str):
+            return None
+        pairs.append((t["key"], t["value"]))
+    return pairs
+
+
+class EventTable:
+    """Append-only columnar event store; see the module docstring for the layout."""
+
+    def __init__(self):
+        self._count = 0
+        self._shapes = Interner()
+        self._shape_ids = array("i")
+        self.epochs = {f: array("q") for f in EPOCH_FIELDS}
+        self.strings = {f: Interner() for f in INTERNED_FIELDS}
+        self.interned = {f: array("i") for f in INTERNED_FIELDS}
+        self.tags = Interner()
+        self._tag_ids = array("i")
+        self._tag_offsets = array("q", [0])
+        self.columns = {}    # any other field -> list of values (None when absent)
+        self._verbatim = {}  # (row, field) -> value that did not fit its column
+
+    @classmethod
+    def from_dicts(cls, events):
+        table = cls()
+        for ev in events:
+            table.append(ev)
+        return table
+
+    def __len__(self):
+        return self._count
+
+    def append(self, ev):
+        row = self._count
+        self._shape_ids.append(self._shapes.intern(tuple(ev)))
+        for f in EPOCH_FIELDS:
+            value = ev.get(f)
+            if value is None or _is_epoch(value):
+                self.epochs[f].append(NULL if value is None else value)
+            else:
+                self.epochs[f].append(NULL)
+                self._verbatim[(row, f)] = value
+        for mirror, source in MIRROR_FIELDS.items():
+            value = ev.get(mirror, _MISSING)
+            if value is not _MISSING and value != self._mirror(row, source, ev):
+                self._verbatim[(row, mirror)] = value
+        for f in INTERNED_FIELDS:
+            value = ev.get(f)
+            if value is None or isinstance(value, str):
+                self.interned[f].append(-1 if value is None else self.strings[f].intern(value))
+            else:
+                self.interned[f].append(-1)
+                self._verbatim[(row, f)] = value
+        tags = ev.get(TAGS_FIELD, _MISSING)
+        pairs = _tag_pairs(tags) if tags is not _MISSING else []
+        if pairs is None:
+            self._verbatim[(row, TAGS_FIELD)] = tags
+            pairs = []
+        self._tag_ids.extend(self.tags.intern(p) for p in pairs)
+        self._tag_offsets.append(len(self._tag_ids))
+        for key, value in ev.items():
+            if key in self.epochs or key in MIRROR_FIELDS or key in self.interned or key == TAGS_FIELD:
+                continue
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = [None] * row
+            column.append(value)
+        for column in self.columns.values():
+            if len(column) == row:
+                column.append(None)
+        self._count += 1
+
+    def _mirror(self, row, source, ev=None):
+        value = ev.get(source) if ev is not None else self.value(row, source)
+        return None if value is None else to_date_str(value)
+
+    def epoch(self, row, field):
+        value = self.epochs[field][row]
+        return None if value == NULL else value
+
+    def row_tags(self, row):
+        """[(key, value), ...] of a row's source_tags."""
+        ids = self._tag_ids[self._tag_offsets[row]:self._tag_offsets[row + 1]]
+        return [self.tags.values[i] for i in ids]
+
+    def value(self, row, field):
+        """A single field of a row (None when absent), without building the dict."""
+        verbatim = self._verbatim.get((row, field), _MISSING)
+        if verbatim is not _MISSING:
+            return verbatim
+        if field in self.epochs:
+            return self.epoch(row, field)
+        if field in MIRROR_FIELDS:
+            return self._mirror(row, MIRROR_FIELDS[field])
+        if field in self.interned:
+            i = self.interned[field][row]
+            return None if i < 0 else self.strings[field].values[i]
+        if field == TAGS_FIELD:
+            return [{"key": k, "value": v} for k, v in self.row_tags(row)]
+        column = self.columns.get(field)
+        return column[row] if column is not None else None
+
+    def to_dict(self, row):
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError("row out of range")
+        return {field: self.value(row, field) for field in self._shapes.values[self._shape_ids[row]]}
+
+    __getitem__ = to_dict
+
+    def __iter__(self):
+        for row in range(self._count):
+            yield self.to_dict(row)
+
+    def to_dicts(self, rows=None):
+        return [self.to_dict(r) for r in (range(self._count) if rows is None else rows)]
+
+    # -- filters: return row numbers ------------------------------------------
+    def between(self, field, lo=None, hi=None):
+        """Rows whose epoch `field` is set and lo <= value <= hi (either bound optional)."""
+        lo = NULL + 1 if lo is None else lo
+        hi = 2 ** 63 - 1 if hi is None else hi
+        return [row for row, v in enumerate(self.epochs[field]) if lo <= v <= hi]
+
+    def with_tag(self, key, value=None):
+        """Rows having a source tag with this key (and value, when given)."""
+        wanted = {i for i, (k, v) in enumerate(self.tags.values) if k == key and (value is None or v == value)}
+        if not wanted:
+            return []
+        offsets, ids = self._tag_offsets, self._tag_ids
+        return [row for row in range(self._count)
+                if any(ids[j] in wanted for j in range(offsets[row], offsets[row + 1]))]
+
+    def where(self, field, value):
+        """Rows whose interned `field` (country, source, ...) equals value."""
+        i = self.strings[field].get(value)
+        if i is None:
+            return []
+        return [row for row, v in enumerate(self.interned[field]) if v == i]
@@ -0,0 +1,281 @@
+"""
+Local detection of duplicate events (renamed events, swapped or changed hyperlinks).
+
+Candidates are generated by blocking instead of comparing every pair: a record is only
+compared with records sharing one of its blocking keys,
+  - normalized domain + start month   (renames on the same site, moved dates)
+  - start month + first name token    (the same event listed under another URL)
+so the work stays near-linear in the DB size. Within a block two records are duplicates when
+  - they have the same normalized URL, start day (the external_id identity) and name,
+  - they are on the same domain and their names have a token-set similarity >= NAME_THRESHOLD, or
+  - they start the same day under the same name (same tokens, ignoring years and stopwords),
+and only when they do not have different countries: URLs differing only in the query string
+(e.g. one location page per city) share an external_id but are different events, which
+different_events / event_tag tell apart. Together these blocks are the
+alias index behind the external_id primary key: a renamed event keeps its external_id, and
+these rules catch URL changes (same name, or a near-identical name on the same site).
+
+Decisions are persisted in a merge map next to the DB (data/percona_events.merge_map.json),
+alias external_id -> canonical external_id, so merge_and_save, the sync ledger and
+reconcile resolve them the same way without any remote lookup.
+"""
+import os, json, re, hashlib
+from urllib.parse import urlsplit
+
+from scripts import jsonl_store
+from scripts.normalize import normalize_component, normalize_url, to_date_str
+
+MAP_VERSION = 2
+MAP_SUFFIX = ".merge_map.json"
+NAME_THRESHOLD = 0.85
+# Blocks larger than this are not discriminative (e.g. a whole month of meetup.com) and are skipped
+MAX_BLOCK = 500
+
+_STOPWORDS = frozenset({"the", "of", "and", "a", "an", "in", "on", "for", "conference", "conf"})
+_YEAR_RE = re.compile(r"(19|20)\d\d")
+
+
+def merge_map_path(db_path):
+    return os.path.splitext(db_path)[0] + MAP_SUFFIX
+
+
+def _words(name):
+    return [w for w in normalize_component(name).split("-")
+            if w and w not in _STOPWORDS and not _YEAR_RE.fullmatch(w)]
+
+
+def name_tokens(name):
+    """Set of significant name words: lowercase, without years and stopwords."""
+    return frozenset(_words(name))
+
+
+def similarity(a, b):
+    """Token-set (Jaccard) similarity of two name token sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _country(record):
+    return (record.get("country") or "").strip().lower()
+
+
+def countries_differ(a, b):
+    """True when both records have a country and they differ."""
+    ca, cb = _country(a), _country(b)
+    return bool(ca and cb and ca != cb)
+
+
+def different_events(a, b):
+    """True when two records sharing an external_id are different events (another country or name)."""
+    return countries_differ(a, b) or name_tokens(a.get("name")) != name_tokens(b.get("name"))
+
+
+def event_tag(record):
+    """Short stable tag (name tokens + country) appended to an external_id shared by different events."""
+    text = " ".join(sorted(name_tokens(record.get("name")))) + "|" + _country(record)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+
+def _domain(url_key):
+    host = urlsplit(url_key).netloc if url_key else ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class _Entry:
+    """Precomputed comparison fields of one record."""
+
+    __slots__ = ("record", "url", "domain", "day", "country", "first", "tokens")
+
+    def __init__(self, record):
+        self.record = record
+        self.url = normalize_url(record.get("hyperlink"))
+        self.domain = _domain(self.url)
+        self.day = to_date_str(record.get("event_start")) or ""
+        self.country = _country(record)
+        words = _words(record.get("name"))
+        self.first = words[0] if words else ""
+        self.tokens = frozenset(words)
+
+    def blocking_keys(self):
+        month = self.day[:7]
+        if not month:
+            return []
+        keys = []
+        if self.domain:
+            keys.append(f"d|{self.domain}|{month}")
+        if self.first:
+            keys.append(f"n|{month}|{self.first}")
+        return keys
+
+
+def _match(a, b):
+    """Why a and b are the same event ('same_url' / 'similar_name'), or None."""
+    if a.country and b.country and a.country != b.country:
+        return None
+    if a.url and a.url == b.url and a.day == b.day:
+        # The same external_id, yet under other names these are different events (see different_events)
+        return "same_url" if a.tokens == b.tokens else None
+    if a.domain and a.domain == b.domain and similarity(a.tokens, b.tokens) >= NAME_THRESHOLD:
+        return "similar_name"
+    if a.day == b.day and a.tokens and a.tokens == b.tokens:
+        return "same_name"
+    return None
+
+
+class Matcher:
+    """Blocking index over records, for finding the stored duplicate of an incoming item."""
+
+    def __init__(self, records=()):
+        self._blocks = {}
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        entry = _Entry(record)
+        for key in entry.blocking_keys():
+            self._blocks.setdefault(key, []).append(entry)
+
+    def match(self, item):
+        """(record, reason) of the best duplicate of item, or None."""
+        entry = _Entry(item)
+        best = None
+        for key in entry.blocking_keys():
+            block = self._blocks.get(key, ())
+            if len(block) > MAX_BLOCK:
+                continue
+            for other in block:
+                reason = _match(entry, other)
+                if reason:
+                    score = 1.0 if reason == "same_url" else similarity(entry.tokens, other.tokens)
+                    if best is None or score > best[0]:
+                        best = (score, other.record, reason)
+        return (best[1], best[2]) if best else None
+
+
+def find_duplicates(records):
+    """
+    Clusters of duplicate records, as lists of (position, reason) in input order;
+    the first position of a cluster has reason None.
+    """
+    entries = [_Entry(r) for r in records]
+    blocks = {}
+    for pos, entry in enumerate(entries):
+        for key in entry.blocking_keys():
+            blocks.setdefault(key, []).append(pos)
+    parent = list(range(len(entries)))
+    reasons = {}
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                ra, rb = root(a), root(b)
+                if ra == rb:
+                    continue
+                reason = _match(entries[a], entries[b])
+                if reason:
+                    parent[max(ra, rb)] = min(ra, rb)
+                    reasons.setdefault(max(a, b), reason)
+    clusters = {}
+    for pos in range(len(entries)):
+        clusters.setdefault(root(pos), []).append(pos)
+    return [[(pos, reasons.get(pos) if pos != members[0] else None) for pos in members]
+            for members in clusters.values() if len(members) > 1]
+
+
+class MergeMap:
+    """
+    Persisted duplicate decisions:
+      { 'version': 2, 'aliases': { alias external_id: { 'canonical': external_id, 'url': alias url,
+                                                         'canonical_url': url, 'reason': str } } }
+    Aliases may chain (A -> B -> C); lookups always resolve to the final record.
+    (Version 1 maps were keyed by name|hyperlink and are discarded; the next merge rebuilds them.)
+    """
+
+    def __init__(self, path=None, aliases=None):
+        self.path = path
+        self.aliases = aliases or {}
+        self.changed = False
+        self._url_index = None
+        self._by_canonical = None
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != MAP_VERSION:
+            return cls(path)
+        aliases = data.get("aliases")
+        return cls(path, aliases if isinstance(aliases, dict) else {})
+
+    def save(self):
+        """Write the map if it changed; returns True when written."""
+        if not self.path or not self.changed:
+            return False
+        payload = {"version": MAP_VERSION, "aliases": dict(sorted(self.aliases.items()))}
+        data = json.dumps(payload, ensure_ascii=False, indent=1).encode("utf-8")
+        jsonl_store.write_atomic(self.path, data)
+        self.changed = False
+        return True
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def add(self, alias_key, canonical_key, alias_url, canonical_url, reason):
+        if alias_key == canonical_key or self.resolve(canonical_key) == alias_key:
+            return
+        self.aliases[alias_key] = {
+            "canonical": canonical_key,
+            "url": alias_url,
+            "canonical_url": canonical_url,
+            "reason": reason,
+        }
+        self.changed = True
+        self._url_index = self._by_canonical = None
+
+    def resolve(self, key):
+        """The merge key of the record `key` was folded into (key itself when it is not an alias)."""
+        seen = set()
+        while key in self.aliases and key not in seen:
+            seen.add(key)
+            key = self.aliases[key]["canonical"]
+        return key
+
+    def aliases_of(self, key):
+        """Keys of every record folded (directly or through a chain) into `key`."""
+        if self._by_canonical is None:
+            by_canonical = {}
+            for alias in self.aliases:
+                by_canonical.setdefault(self.resolve(alias), []).append(alias)
+            self._by_canonical = by_canonical
+        return sorted(self._by_canonical.get(key, ()))
+
+    def _urls(self):
+        if self._url_index is None:
+            # Every URL seen for a record (its own, those of its aliases) points to all the others:
+            # the record may now carry an alias's URL after a URL change
+            groups = {}
+            for key, entry in self.aliases.items():
+                urls = groups.setdefault(self.resolve(key), set())
+                urls.update(u for u in (entry.get("url"), entry.get("canonical_url")) if u)
+            index = {}
+            for urls in groups.values():
+                for url in urls:
+                    index.setdefault(url, set()).update(urls - {url})
+            self._url_index = index
+        return self._url_index
+
+    def alias_urls(self, url_key):
+        """Other normalized URLs of the record at url_key (folded duplicates, former URLs)."""
+        return sorted(self._urls().get(url_key, ()))
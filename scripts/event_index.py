@@ -0,0 +1,115 @@
+import os, json
+from bisect import bisect_left, bisect_right
+
+from scripts import jsonl_store, metrics
+from scripts.merge_diff import _db_signature, load_table
+
+# Inverted index written next to the DB after each merge (data/percona_events.index.json):
+#   rows       [external_id, name, link, cfp_close, country] per record, in DB order
+#   tags       "key=value" (lowercase) -> row ids
+#   countries  lowercase country -> row ids
+#   close_ms / close_ids  cfp_close values sorted ascending, with their row ids, for bisect
+# Queries read only this file, never the DB itself.
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".index.json"
+
+
+def index_path(db_path):
+    return os.path.splitext(db_path)[0] + INDEX_SUFFIX
+
+
+def build(table, db_path):
+    """Build the index for `table` (a columnar.EventTable of db_path) and write it."""
+    rows, tags, countries, closes = [], {}, {}, []
+    for row in range(len(table)):
+        close = table.epoch(row, "cfp_close")
+        country = table.value(row, "country")
+        rows.append([
+            table.value(row, "external_id"),
+            table.value(row, "name"),
+            table.value(row, "cfp_url") or table.value(row, "hyperlink"),
+            close,
+            country,
+        ])
+        for key, value in table.row_tags(row):
+            ids = tags.setdefault(f"{key}={value}".lower(), [])
+            if not ids or ids[-1] != row:
+                ids.append(row)
+        if country:
+            countries.setdefault(country.lower(), []).append(row)
+        if close is not None:
+            closes.append((close, row))
+    closes.sort()
+    index = {
+        "version": INDEX_VERSION,
+        "db": _db_signature(db_path),
+        "count": len(rows),
+        "rows": rows,
+        "tags": tags,
+        "countries": countries,
+        "close_ms": [c for c, _ in closes],
+        "close_ids": [r for _, r in closes],
+    }
+    data = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    jsonl_store.write_atomic(index_path(db_path), data)
+    return index
+
+
+def build_for_db(db_path):
+    """(Re)build the index from the DB file; returns the index."""
+    with metrics.span("index"):
+        return build(load_table(db_path), db_path)
+
+
+def load(db_path):
+    """The index for db_path, or None when it is missing, from another version or stale."""
+    try:
+        with open(index_path(db_path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("db") != _db_signature(db_path):
+        return None
+    return index
+
+
+def load_or_build(db_path):
+    return load(db_path) or build_for_db(db_path)
+
+
+def _union(mapping, keys):
+    ids = set()
+    for k in keys:
+        ids.update(mapping.get(k, ()))
+    return ids
+
+
+def _tag_keys(index, spec):
+    """'key=value' matches that tag; a bare 'value' matches it under any key."""
+    spec = spec.strip().lower()
+    if "=" in spec:
+        return [spec]
+    suffix = f"={spec}"
+    return [k for k in index["tags"] if k.endswith(suffix)]
+
+
+def query(index, tags=(), countries=(), close_from=None, close_to=None):
+    """
+    Row ids matching every filter, ordered by cfp_close (records without one never match).
+    tags: each entry is a comma-separated list of alternatives ('mysql,postgresql');
+    all entries must match. countries: alternatives. close_from/close_to: epoch ms bounds.
+    """
+    lo = 0 if close_from is None else bisect_left(index["close_ms"], close_from)
+    hi = len(index["close_ms"]) if close_to is None else bisect_right(index["close_ms"], close_to)
+    ordered = index["close_ids"][lo:hi]
+    candidates = None
+    for spec in tags:
+        keys = [k for alt in spec.split(",") if alt.strip() for k in _tag_keys(index, alt)]
+        ids = _union(index["tags"], keys)
+        candidates = ids if candidates is None else candidates & ids
+    if countries:
+        ids = _union(index["countries"], [c.strip().lower() for c in countries])
+        candidates = ids if candidates is None else candidates & ids
+    if candidates is None:
+        return list(ordered)
+    return [r for r in ordered if r in candidates]
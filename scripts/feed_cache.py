@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+
+from scripts import metrics
+from scripts.http_client import get_session
+
+# Local cache for upstream feeds (bodies + validators); safe to delete at any time
+CACHE_DIR = os.getenv("CFP_CACHE_DIR") or ".cache"
+CHUNK_SIZE = 64 * 1024
+
+
+class FeedCacheMiss(RuntimeError):
+    """Raised in offline mode when a feed has never been cached."""
+
+
+def _paths(url, cache_dir):
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(cache_dir, "feeds", digest)
+    return f"{base}.body", f"{base}.meta.json"
+
+
+def _load_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def refresh(url, cache_dir=None):
+    """
+    Bring the cached copy of `url` up to date with a conditional request
+    (If-None-Match / If-Modified-Since from the last response). On 200 the body is
+    streamed to disk together with its ETag / Last-Modified.
+    Returns True when the cached body was still current (304).
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    body_path, meta_path = _paths(url, cache_dir)
+    have_body = os.path.exists(body_path)
+    meta = _load_meta(meta_path) if have_body else {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    with get_session().get(url, headers=headers, stream=True) as resp:
+        if resp.status_code == 304 and have_body:
+            return True
+        resp.raise_for_status()
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        tmp = f"{body_path}.tmp"
+        size = 0
+        with open(tmp, "wb") as out:
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                out.write(chunk)
+                size += len(chunk)
+        metrics.incr("feed_bytes_downloaded", size)
+        # Only publish the body once it was fully received
+        os.replace(tmp, body_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }, f)
+    return False
+
+
+def iter_feed(url, offline=False, cache_dir=None, stats=None):
+    """
+    Yield the body of `url` as byte chunks read from the on-disk cache, after
+    refreshing it (see refresh()) unless offline. Offline mode makes no network call.
+    `stats`, if given, gets 'hits' / 'misses' counters incremented.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    body_path, _ = _paths(url, cache_dir)
+    if offline:
+        if not os.path.exists(body_path):
+            raise FeedCacheMiss(f"No cached copy of {url} (run once online first)")
+        hit = True
+    else:
+        hit = refresh(url, cache_dir)
+    if stats is not None:
+        key = "hits" if hit else "misses"
+        stats[key] = stats.get(key, 0) + 1
+        metrics.incr(f"cache_{key}", cache="feed")
+    yield from _read_file(body_path)
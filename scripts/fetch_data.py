@@ -1,130 +1,150 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-import re
-from urllib.parse import urlsplit
+
+from scripts.json_stream import iter_json_array
+from scripts.normalize import build_external_id, normalize_component, normalize_url, to_date_str
+from scripts import feed_cache, metrics
 
 # Single source (developers.events). Allow optional env override; no mirror fallback.
 EVENTS_URL = os.getenv("ALL_EVENTS_URL") or "https://developers.events/all-events.json"
 CFPS_URL   = os.getenv("ALL_CFPS_URL")  or "https://developers.events/all-cfps.json"
 
-def _normalize_component(value):
-    """
-    Normalize a component for external_id:
-    - Lowercase
-    - Trim whitespace
-    - Collapse spaces and non-alphanumerics to single hyphens
-    - Return empty string if falsy
-    """
-    if not value:
-        return ""
-    text = str(value).strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^a-z0-9]+", "-", text)
-    text = text.strip("-")
-    return text
-
-def _normalize_url(url: str) -> str:
+# Only these all-events.json fields are read by the enrichment step
+EVENT_FIELDS = ("hyperlink", "name", "date", "city", "country", "location", "tags")
+
+def stream_feed(url, offline=False, cache_stats=None):
     """
-    Normalize URLs for ID stability:
-    - lowercase scheme/host
-    - drop query/fragment (including utm params)
-    - remove trailing slash from path
+    Yield the records of a JSON array feed while it downloads.
+    Goes through the conditional-request feed cache (see feed_cache.iter_feed).
     """
-    if not url:
-        return ""
-    try:
-        parts = urlsplit(str(url).strip())
-        scheme = (parts.scheme or "https").lower()
-        netloc = (parts.netloc or "").lower()
-        path = (parts.path or "").rstrip("/")
-        return f"{scheme}://{netloc}{path}"
-    except Exception:
-        text = str(url).strip().lower()
-        text = text.split("?", 1)[0].split("#", 1)[0]
-        return text.rstrip("/")
-
-def build_external_id(source: str, hyperlink: str, event_start):
+    yield from iter_json_array(feed_cache.iter_feed(url, offline=offline, stats=cache_stats))
+
+def download_feeds(urls, cache_stats=None):
+    """Refresh the cached copies of all feeds concurrently over the shared pooled session."""
+    with ThreadPoolExecutor(max_workers=max(1, len(urls))) as pool:
+        reused = list(pool.map(feed_cache.refresh, urls))
+    if cache_stats is not None:
+        cache_stats["hits"] = cache_stats.get("hits", 0) + sum(reused)
+        cache_stats["misses"] = cache_stats.get("misses", 0) + len(reused) - sum(reused)
+    metrics.incr("cache_hits", sum(reused), cache="feed")
+    metrics.incr("cache_misses", len(reused) - sum(reused), cache="feed")
+
+def normalize_date_range(value):
+    """Return (start, end) from a possibly missing/short 'date' field."""
+    if isinstance(value, (list, tuple)):
+        start = value[0] if len(value) >= 1 else None
+        end = value[1] if len(value) >= 2 else None
+        return start, end
+    return None, None
+
+# Join keys in priority order: the raw 'hyperlink or name' string (historical behaviour),
+# the normalized URL, then normalized name + start day.
+JOIN_KEYS = ("exact", "url", "name_date")
+
+def join_keys(record):
+    """Join keys of an all-events record or a CFP's 'conf' block, in JOIN_KEYS order (None if absent)."""
+    exact = (record.get("hyperlink") or record.get("name") or "").strip() or None
+    url = normalize_url(record.get("hyperlink")) or None
+    name = normalize_component(record.get("name"))
+    start = to_date_str(normalize_date_range(record.get("date"))[0])
+    return exact, url, (f"{name}|{start}" if name and start else None)
+
+def build_join_index(events, wanted=None):
     """
-    Build a stable external_id:
-    Format: {source}::{normalized_hyperlink}::{event_start}
-    - Prefer stable hyperlink over name/city
-    - event_start is included to disambiguate rare cases of reused URLs
+    One-pass index over all-events records: {key kind: {key: event}}.
+    When `wanted` ({kind: set of keys}) is given, only events reachable through one of
+    those keys are kept (trimmed to EVENT_FIELDS). Later records win, as before.
     """
-    normalized_url = _normalize_url(hyperlink)
-    parts = [
-        _normalize_component(source),
-        _normalize_component(normalized_url),
-        str(event_start or "")
-    ]
-    return "::".join(parts)
-
-def fetch_and_clean():
+    index = {kind: {} for kind in JOIN_KEYS}
+    for e in events:
+        keys = join_keys(e)
+        if wanted is not None and not any(k and k in wanted[kind] for kind, k in zip(JOIN_KEYS, keys)):
+            continue
+        e = {f: e[f] for f in EVENT_FIELDS if f in e}
+        for kind, k in zip(JOIN_KEYS, keys):
+            if k:
+                index[kind][k] = e
+    return index
+
+def lookup_event(index, conf):
+    """Return (event, key kind) for a CFP's conf block, trying keys in priority order."""
+    for kind, k in zip(JOIN_KEYS, join_keys(conf)):
+        if k and k in index[kind]:
+            return index[kind][k], kind
+    return None, None
+
+def fetch_and_clean(offline=False, cache_stats=None, join_stats=None):
     """
     Fetch public JSON feeds and return a list of 'open CFP' items with the fields we care about,
     including source_tags from all-events.json.
+    Both feeds are parsed as they stream in: closed CFPs are dropped while decoding, and only the
+    events referenced by an open CFP are kept (trimmed to EVENT_FIELDS).
+    Online, both feeds are first downloaded in parallel into the feed cache and then parsed
+    from disk; with offline=True they are read from the local cache only.
+    CFPs are enriched through build_join_index/lookup_event; `join_stats`, if given, receives
+    the number of CFPs matched by each key kind and the unmatched count.
     """
-    events_resp = requests.get(EVENTS_URL, timeout=30); events_resp.raise_for_status()
-    cfps_resp   = requests.get(CFPS_URL,   timeout=30); cfps_resp.raise_for_status()
-    events_raw = events_resp.json()
-    cfps_raw   = cfps_resp.json()
-
+    if not offline:
+        with metrics.span("fetch"):
+            download_feeds([CFPS_URL, EVENTS_URL], cache_stats)
+        offline = True
+        cache_stats = None
     now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-    open_cfps = [c for c in cfps_raw if c.get("untilDate") and c["untilDate"] > now_ms]
+    # Closed CFPs are dropped while the feed is decoded, so "parse" includes that filter
+    with metrics.span("parse"):
+        open_cfps = [c for c in stream_feed(CFPS_URL, offline, cache_stats) if c.get("untilDate") and c["untilDate"] > now_ms]
+    with metrics.span("filter"):
+        wanted = {kind: set() for kind in JOIN_KEYS}
+        for c in open_cfps:
+            for kind, k in zip(JOIN_KEYS, join_keys(c.get("conf", {}) or {})):
+                if k:
+                    wanted[kind].add(k)
 
     # Build lookup from all-events.json to enrich fields (incl. source_tags)
-    by_link_or_name = {}
-    for e in events_raw:
-        key = (e.get("hyperlink") or e.get("name") or "").strip()
-        if key:
-            by_link_or_name[key] = {
-                "event": e,
-                "source_tags": e.get("tags") or []   # <— take original tags from source
+    with metrics.span("parse"):
+        index = build_join_index(stream_feed(EVENTS_URL, offline, cache_stats), wanted)
+
+    with metrics.span("enrich"):
+        stats = {kind: 0 for kind in JOIN_KEYS}
+        stats["unmatched"] = 0
+        cleaned = []
+        for c in open_cfps:
+            conf = c.get("conf", {}) or {}
+
+            ev, matched_by = lookup_event(index, conf)
+            ev           = ev or {}
+            source_tags  = ev.get("tags") or []   # <— take original tags from source
+            stats[matched_by or "unmatched"] += 1
+
+            conf_start, conf_end = normalize_date_range(conf.get("date"))
+            ev_start, ev_end     = normalize_date_range(ev.get("date"))
+
+            item_name      = conf.get("name") or ev.get("name")
+            item_hyperlink = conf.get("hyperlink") or ev.get("hyperlink")
+            item_city      = ev.get("city") or ""
+            item_source    = "developers.events"
+            item_start     = conf_start or ev_start
+
+            cleaned_item = {
+                "name":        item_name,
+                "hyperlink":   item_hyperlink,
+                "cfp_url":     c.get("link"),
+                "cfp_close":   c.get("untilDate"),  # epoch ms
+                "event_start": item_start,
+                "event_end":   conf_end or ev_end,
+                "location":    conf.get("location") or ev.get("location"),
+                "city":        item_city,
+                "country":     ev.get("country"),
+                "source":      item_source,
+                "source_tags": source_tags,         # <— keep source-provided tags intact
             }
+            cleaned_item["external_id"] = build_external_id(
+                cleaned_item["source"], cleaned_item["hyperlink"], cleaned_item["event_start"]
+            )
 
-    def normalize_date_range(value):
-        """Return (start, end) from a possibly missing/short 'date' field."""
-        if isinstance(value, (list, tuple)):
-            start = value[0] if len(value) >= 1 else None
-            end = value[1] if len(value) >= 2 else None
-            return start, end
-        return None, None
-
-    cleaned = []
-    for c in open_cfps:
-        conf = c.get("conf", {}) or {}
-        key = (conf.get("hyperlink") or conf.get("name") or "").strip()
-
-        ev_match     = by_link_or_name.get(key, {})
-        ev           = ev_match.get("event", {}) or {}
-        source_tags  = ev_match.get("source_tags", [])
-
-        conf_start, conf_end = normalize_date_range(conf.get("date"))
-        ev_start, ev_end     = normalize_date_range(ev.get("date"))
-
-        item_name      = conf.get("name") or ev.get("name")
-        item_hyperlink = conf.get("hyperlink") or ev.get("hyperlink")
-        item_city      = ev.get("city") or ""
-        item_source    = "developers.events"
-        item_start     = conf_start or ev_start
-
-        cleaned_item = {
-            "name":        item_name,
-            "hyperlink":   item_hyperlink,
-            "cfp_url":     c.get("link"),
-            "cfp_close":   c.get("untilDate"),  # epoch ms
-            "event_start": item_start,
-            "event_end":   conf_end or ev_end,
-            "location":    conf.get("location") or ev.get("location"),
-            "city":        item_city,
-            "country":     ev.get("country"),
-            "source":      item_source,
-            "source_tags": source_tags,         # <— keep source-provided tags intact
-        }
-        cleaned_item["external_id"] = build_external_id(
-            cleaned_item["source"], cleaned_item["hyperlink"], cleaned_item["event_start"]
-        )
-
-        cleaned.append(cleaned_item)
+            cleaned.append(cleaned_item)
 
+    if join_stats is not None:
+        join_stats.update(stats)
     return cleaned
@@ -0,0 +1,101 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scripts import metrics
+
+# Defaults; override with env vars or per session in get_session()
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT") or 30)
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES") or 3)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE") or 16)
+
+_SESSIONS = {}
+_LOCK = threading.Lock()
+
+
+def accept_encoding():
+    """gzip/deflate always; br only when a brotli decoder is installed (urllib3 needs it)."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return "gzip, deflate, br"
+        except ImportError:
+            return "gzip, deflate"
+
+
+class _TimeoutSession(requests.Session):
+    """Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _record_response(resp, *args, **kwargs):
+    """Response hook: count requests by endpoint and bytes sent/received."""
+    metrics.incr("http_requests", endpoint=metrics.endpoint_label(resp.request.method, resp.url), status=resp.status_code)
+    body = resp.request.body
+    if body:
+        metrics.incr("http_bytes_sent", len(body))
+    # Streamed bodies are not read here; fall back to Content-Length (the transfer size)
+    if kwargs.get("stream"):
+        received = int(resp.headers.get("Content-Length") or 0)
+    else:
+        received = len(resp.content)
+    metrics.incr("http_bytes_received", received)
+    return resp
+
+
+def build_session(retries=HTTP_RETRIES, timeout=HTTP_TIMEOUT, pool_size=HTTP_POOL_SIZE):
+    """
+    Build a keep-alive session with a connection pool of `pool_size` per host.
+    `retries` covers connection errors and 502/503/504 on idempotent methods
+    (honoring Retry-After); pass 0 when the caller handles retries itself.
+    """
+    session = _TimeoutSession(timeout)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = accept_encoding()
+    session.hooks["response"].append(_record_response)
+    return session
+
+
+def get_session(name="default", **options):
+    """
+    Return the process-wide session registered under `name`, creating it on first use
+    with the given build_session() options. Sessions are shared across threads.
+    """
+    with _LOCK:
+        session = _SESSIONS.get(name)
+        if session is None:
+            session = _SESSIONS[name] = build_session(**options)
+        return session
+
+
+def close_sessions():
+    with _LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
@@ -0,0 +1,91 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_WS = " \t\r\n"
+_DECODER = json.JSONDecoder()
+
+
+class _Chunks:
+    """Incrementally decoded UTF-8 text from an iterable of byte (or str) chunks."""
+
+    def __init__(self, chunks: Iterable[Any]) -> None:
+        self._it = iter(chunks)
+        self._dec = codecs.getincrementaldecoder("utf-8")()
+        self.done = False
+
+    def read(self) -> str:
+        for chunk in self._it:
+            if not chunk:
+                continue
+            if isinstance(chunk, str):
+                return chunk
+            text = self._dec.decode(chunk)
+            if text:
+                return text
+        self.done = True
+        return self._dec.decode(b"", final=True)
+
+
+def iter_json_array(chunks: Iterable[Any]) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array as they are decoded from `chunks`
+    (e.g. requests' Response.iter_content), without buffering the whole document.
+    Only the current element and the unread tail of the stream are held in memory.
+    Raises ValueError on malformed input.
+    """
+    src = _Chunks(chunks)
+    buf = ""
+    pos = 0
+
+    def fill() -> bool:
+        nonlocal buf, pos
+        if src.done:
+            return False
+        buf = buf[pos:] + src.read()
+        pos = 0
+        return True
+
+    def skip_ws() -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return
+
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+        if buf[pos] == "]":
+            # Drain the stream so producers (e.g. a cache writer) see it through to the end
+            pos += 1
+            skip_ws()
+            if pos < len(buf):
+                raise ValueError("Extra data after JSON array")
+            return
+        if not first:
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            skip_ws()
+        first = False
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise ValueError("Truncated or malformed JSON array element")
+            # A scalar ending exactly at the buffer edge may continue in the next chunk
+            if end == len(buf) and fill():
+                continue
+            break
+        pos = end
+        yield value
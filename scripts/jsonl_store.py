@@ -0,0 +1,200 @@
+import os, json, gzip, mmap
+from array import array
+
+# DB paths with this suffix are stored as sorted JSON Lines: one compact record per line,
+# keys sorted, records ordered by external_id. A daily commit then only touches the lines
+# of records that actually changed.
+JSONL_SUFFIXES = (".jsonl",)
+GZIP_SUFFIX = ".gz"
+# Offset index next to the file (<path>.idx): int64 header [data size, data mtime_ns, count]
+# followed by count + 1 line start offsets, so record i is bytes offsets[i]:offsets[i + 1]
+INDEX_SUFFIX = ".idx"
+_HEADER = 3
+
+# Also write a gzip-compressed copy next to the file (<path>.gz); set from --gzip-sidecar
+GZIP_SIDECAR = False
+
+
+def is_jsonl_path(path):
+    return str(path).lower().endswith(JSONL_SUFFIXES)
+
+
+def sidecar_path(path):
+    return f"{path}{GZIP_SUFFIX}"
+
+
+def index_path(path):
+    return f"{path}{INDEX_SUFFIX}"
+
+
+def record_key(ev):
+    """Stable sort key: external_id, then name|hyperlink for legacy records without one."""
+    return (ev.get("external_id") or "", ev.get("name") or "", ev.get("hyperlink") or "")
+
+
+def dumps(ev):
+    return json.dumps(ev, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def encode(records):
+    """The file body for `records`: sorted, one JSON object per line."""
+    lines = sorted((record_key(ev), dumps(ev)) for ev in records)
+    return "".join(line + "\n" for _, line in lines).encode("utf-8")
+
+
+def _parse(text):
+    # Encoded records never contain a raw newline, so the lines can be decoded as one array,
+    # which is much faster than one json.loads call per line
+    return json.loads("[" + ",".join(filter(None, text.split("\n"))) + "]")
+
+
+def load(path):
+    """All records of a JSONL DB; falls back to the gzip sidecar when only that exists."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return _parse(f.read())
+    if os.path.exists(sidecar_path(path)):
+        with gzip.open(sidecar_path(path), "rt", encoding="utf-8") as f:
+            return _parse(f.read())
+    return []
+
+
+def write_atomic(path, data):
+    """
+    Replace `path` with `data` (bytes) through a temp file + rename, so readers never see a
+    partial file. Returns False without writing when the file already holds exactly `data`.
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def save(path, records, gzip_sidecar=None):
+    """
+    Write records as sorted JSONL (and the gzip sidecar when enabled).
+    Returns True if the file changed; an identical file is left untouched.
+    """
+    data = encode(records)
+    changed = write_atomic(path, data)
+    if changed or _index_header(path) is None:
+        write_index(path, line_offsets(data))
+    if gzip_sidecar if gzip_sidecar is not None else GZIP_SIDECAR:
+        if changed or not os.path.exists(sidecar_path(path)):
+            # mtime=0 keeps the compressed bytes identical for identical content
+            write_atomic(sidecar_path(path), gzip.compress(data, mtime=0))
+    return changed
+
+
+def line_offsets(data):
+    """Start offset of every line in `data` (bytes or mmap), plus the end offset."""
+    offsets = array("q", [0])
+    pos = data.find(b"\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = data.find(b"\n", pos + 1)
+    if offsets[-1] < len(data):
+        offsets.append(len(data))
+    return offsets
+
+
+def write_index(path, offsets):
+    """Persist the offsets of `path`, stamped with its current size and mtime."""
+    st = os.stat(path)
+    header = array("q", [st.st_size, st.st_mtime_ns, len(offsets) - 1])
+    try:
+        write_atomic(index_path(path), (header + offsets).tobytes())
+    except OSError:
+        pass  # read-only checkout: readers rebuild the offsets in memory
+
+
+def _index_header(path):
+    """Header of a valid index for `path`, or None when it is missing or stale."""
+    try:
+        st = os.stat(path)
+        with open(index_path(path), "rb") as f:
+            header = array("q")
+            header.frombytes(f.read(_HEADER * header.itemsize))
+    except (OSError, ValueError):
+        return None
+    if len(header) != _HEADER or header[0] != st.st_size or header[1] != st.st_mtime_ns:
+        return None
+    return header
+
+
+class RecordReader:
+    """
+    Random access to the records of a JSONL DB without parsing the whole file.
+    The data file and its offset index are memory-mapped; a record is decoded only when
+    read, so reading the first N records costs O(N) regardless of the DB size.
+    A missing or stale index is rebuilt (one newline scan, no JSON parsing) and saved.
+
+        with RecordReader(path) as reader:
+            first = reader[0]
+            preview = reader[:10]
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._data = self._index = self._view = None
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = self._load_offsets()
+
+    def _load_offsets(self):
+        if self._data is None:
+            return array("q", [0])
+        if _index_header(self.path) is not None:
+            with open(index_path(self.path), "rb") as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._index).cast("q")
+            return self._view[_HEADER:]
+        offsets = line_offsets(self._data)
+        write_index(self.path, offsets)
+        return offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def _record(self, i):
+        return json.loads(self._data[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._record(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("record index out of range")
+        return self._record(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def close(self):
+        if self._view is not None:
+            self._offsets.release()
+            self._view.release()
+        for handle in (self._index, self._data, self._file):
+            if handle is not None:
+                handle.close()
+        self._index = self._data = self._view = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
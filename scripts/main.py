@@ -1,47 +1,83 @@
 from datetime import datetime, timezone
 import argparse
 from scripts.fetch_data import fetch_and_clean
-from scripts.merge_diff import merge_and_save, load_db
+from scripts.merge_diff import merge_and_save, read_db, import_json, export_json, migrate_db
+from scripts import event_index, jsonl_store, metrics, normalize, relevance, sqlite_store
+from scripts.feed_cache import FeedCacheMiss
 
 DB_PATH = "data/percona_events.json"
 
 def to_date_str(ts):
     """Convert epoch ms (int) or ISO-like string to YYYY-MM-DD for preview output."""
-    if ts is None:
-        return ""
-    try:
-        if isinstance(ts, (int, float)):
-            dt = datetime.fromtimestamp(int(ts) / 1000, tz=timezone.utc)
-            return dt.strftime("%Y-%m-%d")
-    except Exception:
-        pass
-    if isinstance(ts, str):
-        for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%SZ"):
-            try:
-                dt = datetime.strptime(ts, fmt)
-                return dt.strftime("%Y-%m-%d")
-            except Exception:
-                continue
-        return ts[:10]
-    return ""
+    return normalize.to_date_str(ts) or ""
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch open CFPs and update local DB.")
     parser.add_argument("--limit", type=int, default=None, help="Process only the first N events (testing)")
+    parser.add_argument("--db", default=DB_PATH, help="DB path: JSON file, sorted JSON Lines when ending in .jsonl, or SQLite when ending in .sqlite/.sqlite3/.db")
+    parser.add_argument("--import-json", default=None, help="Seed the SQLite/JSONL --db from this JSON file before merging")
+    parser.add_argument("--offline", action="store_true", help="Run from the cached feeds without any network access")
+    parser.add_argument("--force-merge", action="store_true", help="Merge even if the input is identical to the last run")
+    parser.add_argument("--migrate", action="store_true", help="Backfill legacy records in --db (ids, timestamps, date mirrors) and exit")
+    parser.add_argument("--export-json", default=None, help="After merging a SQLite/JSONL --db, export it to this JSON file")
+    parser.add_argument("--no-index", action="store_true", help="Do not rebuild the tag/country/date index after merging")
+    parser.add_argument("--gzip-sidecar", action="store_true", help="With a .jsonl --db, also write a gzip-compressed copy (<db>.gz)")
+    parser.add_argument("--metrics", default=None, help="Write stage timings and counters here (.prom/.txt: Prometheus text, else JSON)")
     args = parser.parse_args()
+    db_path = args.db
+    if (args.import_json or args.export_json) and not (
+        sqlite_store.is_sqlite_path(db_path) or jsonl_store.is_jsonl_path(db_path)
+    ):
+        raise SystemExit("--import-json/--export-json require a SQLite or JSONL --db path")
+    jsonl_store.GZIP_SIDECAR = args.gzip_sidecar
 
     start_time = datetime.now(timezone.utc)
     print(f"Run started at {start_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
 
+    if args.migrate:
+        changed = migrate_db(db_path)
+        print(f"Migrated {db_path}: {changed} legacy records normalized")
+        return
+
+    if args.import_json:
+        imported = import_json(args.import_json, db_path)
+        print(f"Imported {imported} records from {args.import_json} into {db_path}")
+
     # Step 1 — Fetch & Clean (only open CFPs)
-    open_cfps = fetch_and_clean()
+    cache_stats = {}
+    join_stats = {}
+    try:
+        open_cfps = fetch_and_clean(offline=args.offline, cache_stats=cache_stats, join_stats=join_stats)
+    except FeedCacheMiss as e:
+        raise SystemExit(str(e))
+    if cache_stats.get("hits"):
+        print(f"Feed cache: {cache_stats.get('hits', 0)} reused, {cache_stats.get('misses', 0)} downloaded")
     if args.limit is not None:
         open_cfps = open_cfps[: args.limit]
 
+    # Score relevance (database / open-source keywords); stored on each record
+    with metrics.span("score"):
+        relevance.score_events(open_cfps)
+
     # Step 2/3 — Compare with DB & Save
-    result = merge_and_save(open_cfps, DB_PATH)
+    # With --limit the input is partial, so absence from it must not close records
+    with metrics.span("merge"):
+        result = merge_and_save(
+            open_cfps, db_path, skip_unchanged=not args.force_merge, detect_missing=args.limit is None,
+        )
+    if result.get("unchanged"):
+        print("Input unchanged since last merge; DB left as is.")
+
+    print(f"Updated {db_path}: total={result['count']} | added={len(result['added'])} | updated={len(result['updated'])} | closed={len(result['closed'])}")
 
-    print(f"Updated {DB_PATH}: total={result['count']} | added={len(result['added'])} | updated={len(result['updated'])} | closed={len(result['closed'])}")
+    # Step 4 — Inverted index for scripts.query (skipped when it is still current)
+    if not args.no_index and event_index.load(db_path) is None:
+        index = event_index.build_for_db(db_path)
+        print(f"Indexed {index['count']} records into {event_index.index_path(db_path)}")
+
+    if args.export_json:
+        exported = export_json(db_path, args.export_json)
+        print(f"Exported {exported} records to {args.export_json}")
 
     # Prepare summary metrics for end-of-run print
     fetched_count = len(open_cfps)
@@ -55,8 +91,8 @@ def main():
 
     # Preview first 10 rows from the DB as a friendly fixed-width table
     try:
-        db = load_db(DB_PATH)
-        preview = db[:10]
+        # Only the previewed records are read and decoded
+        preview = read_db(db_path, limit=10)
         # Column specs: (header, width)
         cols = [
             ("Name", 44),
@@ -87,7 +123,7 @@ def main():
             row = " | ".join(fixed_cells + [last_col])
             print(row.rstrip())
     except Exception as e:
-        print(f"Could not load preview from {DB_PATH}: {e}")
+        print(f"Could not load preview from {db_path}: {e}")
 
     # End-of-run concise summary (rows)
     print("\nSummary:")
@@ -95,14 +131,38 @@ def main():
     print(f"| added: {added_count}")
     print(f"| updated: {updated_count}")
     print(f"| closed: {closed_count}")
+    if fetched_count:
+        matched = fetched_count - join_stats.get("unmatched", 0)
+        print(
+            f"| enrichment match: {matched}/{fetched_count} ({matched / fetched_count:.1%}) "
+            f"exact={join_stats.get('exact', 0)} url={join_stats.get('url', 0)} name+date={join_stats.get('name_date', 0)}"
+        )
+    if fetched_count:
+        relevant = sum(1 for ev in open_cfps if ev[relevance.SCORE_FIELD] > 0)
+        print(f"| relevant (score > 0): {relevant}/{fetched_count}")
     if window:
         print(f"| cfp close window: {window}")
     if args.limit is not None:
         print(f"| limit: {args.limit}")
 
+    print("\nTimings:")
+    for line in metrics.summary_lines():
+        print(line)
+
     end_time = datetime.now(timezone.utc)
+    duration = (end_time - start_time).total_seconds()
     print(f"Run finished at {end_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-    print(f"Duration: {(end_time - start_time).seconds} seconds")
+    print(f"Duration: {duration:.1f} seconds")
+    if args.metrics:
+        metrics.write(args.metrics, "cfp_pipeline", {
+            "duration_seconds": round(duration, 3),
+            "fetched": fetched_count,
+            "added": added_count,
+            "updated": updated_count,
+            "closed": closed_count,
+            "total": result["count"],
+        })
+        print(f"Metrics written to {args.metrics}")
 
 if __name__ == "__main__":
     main()
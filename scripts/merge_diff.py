@@ -1,163 +1,587 @@
-import os, json, re
+import os, json, hashlib
 from datetime import datetime, timezone
-from urllib.parse import urlsplit
+from itertools import islice
+
+from scripts import archive, dedup, jsonl_store, metrics, sqlite_store
+from scripts.columnar import EventTable
+from scripts.json_stream import iter_json_array
+from scripts.normalize import compute_external_id, normalize_url, to_date_str
+from scripts.feed_cache import CACHE_DIR
+
+# Fingerprint of the last merged input per DB, used to skip no-op merges
+MERGE_STATE_PATH = os.path.join(CACHE_DIR, "merge_state.json")
+# Absence from the feed only closes records when the feed looks complete: an empty or
+# truncated feed (fewer events than this fraction of the active records) closes nothing as missing
+MIN_FEED_RATIO = 0.5
 
 def load_db(path):
+    if jsonl_store.is_jsonl_path(path):
+        return jsonl_store.load(path)
     if not os.path.exists(path):
         return []
+    if sqlite_store.is_sqlite_path(path):
+        conn = sqlite_store.connect(path)
+        try:
+            return sqlite_store.load_all(conn)
+        finally:
+            conn.close()
     try:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         return []
 
+def iter_db(path, limit=None):
+    """
+    Yield DB records lazily, in load_db order, decoding only what is consumed:
+    JSONL through the memory-mapped offset index, SQLite row by row, and the JSON
+    array file with the streaming parser (which stops reading once `limit` is reached).
+    """
+    if jsonl_store.is_jsonl_path(path) and os.path.exists(path):
+        with jsonl_store.RecordReader(path) as reader:
+            yield from reader[:limit] if limit is not None else reader
+        return
+    if not os.path.exists(path) or jsonl_store.is_jsonl_path(path):
+        # missing file, or a JSONL DB present only as its gzip sidecar
+        yield from islice(load_db(path), limit)
+        return
+    if sqlite_store.is_sqlite_path(path):
+        conn = sqlite_store.connect(path)
+        try:
+            yield from sqlite_store.iter_all(conn, limit)
+        finally:
+            conn.close()
+        return
+    with open(path, "rb") as f:
+        yield from islice(iter_json_array(iter(lambda: f.read(64 * 1024), b"")), limit)
+
+def read_db(path, limit=None):
+    """The first `limit` records (all when None) without loading the rest of the DB."""
+    if limit is None:
+        return load_db(path)
+    return list(iter_db(path, limit))
+
+def load_table(path):
+    """Columnar copy of the DB (see columnar.EventTable), built while streaming the records."""
+    return EventTable.from_dicts(iter_db(path))
+
 def save_db(path, data):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def _normalize_component(value):
-    if not value:
-        return ""
-    text = str(value).strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"[^a-z0-9]+", "-", text)
-    text = text.strip("-")
-    return text
-
-def _normalize_url(url: str) -> str:
-    if not url:
-        return ""
-    try:
-        parts = urlsplit(str(url).strip())
-        scheme = (parts.scheme or "https").lower()
-        netloc = (parts.netloc or "").lower()
-        path = (parts.path or "").rstrip("/")
-        return f"{scheme}://{netloc}{path}"
-    except Exception:
-        text = str(url).strip().lower()
-        text = text.split("?", 1)[0].split("#", 1)[0]
-        return text.rstrip("/")
+    """
+    Write the DB atomically (temp file + rename); .jsonl paths use the sorted JSONL format.
+    Returns False when the file already had exactly this content and was left untouched.
+    """
+    if jsonl_store.is_jsonl_path(path):
+        return jsonl_store.save(path, data)
+    return jsonl_store.write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
 
-def _compute_external_id(ev):
-    src   = _normalize_component(ev.get("source"))
-    norm_url = _normalize_component(_normalize_url(ev.get("hyperlink")))
-    start = str(ev.get("event_start") or "")
-    return "::".join([src, norm_url, start])
+def _make_key(e):
+    """
+    Primary key of a record: its external_id (source, normalized URL, start date), computed
+    for legacy records without one. Name edits keep the key; URL changes are resolved
+    through the alias index (see _resolve_key).
+    """
+    return e.get("external_id") or compute_external_id(e)
 
-def _to_date_str(value):
+def _apply_update(ev, item):
     """
-    Convert epoch ms (int/float) or ISO-like string to YYYY-MM-DD for readability.
-    Returns None for unknown/invalid.
+    Copy source-driven fields from a fresh feed item onto an existing record.
+    Returns True (and touches updated_at) only if a field actually changed.
     """
-    if value is None:
+    before = dict(ev)
+    # Update only source-driven fields (do NOT overwrite team-managed fields).
+    # external_id is the record's key and is never overwritten; the hyperlink follows the
+    # source (a URL change is matched through the alias index, see dedup).
+    # Update source-driven fields
+    if item.get("name"):
+        ev["name"] = item["name"]
+    if item.get("hyperlink"):
+        ev["hyperlink"] = item["hyperlink"]
+    if item.get("cfp_url") is not None:
+        ev["cfp_url"] = item["cfp_url"]
+    if item.get("location") is not None:
+        ev["location"] = item["location"]
+    if item.get("city") is not None:
+        ev["city"] = item["city"]
+    if item.get("country") is not None:
+        ev["country"] = item["country"]
+    if item.get("source") is not None:
+        ev["source"] = item["source"]
+    if item.get("source_tags") is not None:
+        ev["source_tags"] = item["source_tags"]
+    if item.get("relevance_score") is not None:
+        ev["relevance_score"] = item["relevance_score"]
+    # Dates: keep epoch ms, add readable mirror fields
+    if item.get("cfp_close") is not None:
+        ev["cfp_close"] = item["cfp_close"]
+        ev["cfp_close_date"] = to_date_str(item["cfp_close"])
+    if item.get("event_start") is not None:
+        ev["event_start"] = item["event_start"]
+        ev["event_start_date"] = to_date_str(item["event_start"])
+    if item.get("event_end") is not None:
+        ev["event_end"] = item["event_end"]
+        ev["event_end_date"] = to_date_str(item["event_end"])
+    # Ensure we backfill external_id if missing
+    if not ev.get("external_id"):
+        ev["external_id"] = compute_external_id(ev)
+    if ev == before:
+        return False
+    # Touch updated_at timestamp
+    ev["updated_at"] = datetime.now(timezone.utc).isoformat()
+    return True
+
+def _init_new(item):
+    """Prepare a feed item to be stored as a new record."""
+    item.setdefault("source_tags", [])
+    # Ensure external_id exists for new items even if upstream missed it
+    if not item.get("external_id"):
+        item["external_id"] = compute_external_id(item)
+    # Initialize timestamps; do NOT add team-managed fields
+    now_iso = datetime.now(timezone.utc).isoformat()
+    item["created_at"] = now_iso
+    item["updated_at"] = now_iso
+    # Dates: keep epoch ms, add readable mirror fields
+    if item.get("cfp_close") is not None:
+        item["cfp_close_date"] = to_date_str(item.get("cfp_close"))
+    if item.get("event_start") is not None:
+        item["event_start_date"] = to_date_str(item.get("event_start"))
+    if item.get("event_end") is not None:
+        item["event_end_date"] = to_date_str(item.get("event_end"))
+
+def _backfill(ev):
+    """Ensure a record has an external_id, timestamps and mirror date fields."""
+    if not ev.get("external_id"):
+        ev["external_id"] = compute_external_id(ev)
+    # Ensure timestamps exist
+    if not ev.get("created_at"):
+        ev["created_at"] = datetime.now(timezone.utc).isoformat()
+    if not ev.get("updated_at"):
+        ev["updated_at"] = ev["created_at"]
+    # Ensure mirror date fields exist
+    if ev.get("cfp_close") is not None:
+        ev["cfp_close_date"] = to_date_str(ev.get("cfp_close"))
+    if ev.get("event_start") is not None:
+        ev["event_start_date"] = to_date_str(ev.get("event_start"))
+    if ev.get("event_end") is not None:
+        ev["event_end_date"] = to_date_str(ev.get("event_end"))
+
+def _input_fingerprint(open_cfps):
+    blob = json.dumps(open_cfps, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _db_signature(path):
+    try:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
         return None
+
+def _load_merge_state():
     try:
-        if isinstance(value, (int, float)):
-            dt = datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
-            return dt.strftime("%Y-%m-%d")
+        with open(MERGE_STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
     except Exception:
+        return {}
+
+def _save_merge_state(db_path, fingerprint, count):
+    state = _load_merge_state()
+    state[os.path.abspath(db_path)] = {"input": fingerprint, "db": _db_signature(db_path), "count": count}
+    try:
+        os.makedirs(os.path.dirname(MERGE_STATE_PATH) or ".", exist_ok=True)
+        with open(MERGE_STATE_PATH, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    except OSError:
         pass
-    if isinstance(value, str):
-        # Try common formats; otherwise take first 10 chars if looks like a date
-        for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%SZ"):
-            try:
-                dt = datetime.strptime(value, fmt)
-                return dt.strftime("%Y-%m-%d")
-            except Exception:
-                continue
-        return value[:10] if len(value) >= 10 else value
+
+def _closed_reason(ev, now_ms, current_keys):
+    """Why a stored record is no longer active, or None if it still is."""
+    cfp_close = ev.get("cfp_close")
+    if isinstance(cfp_close, (int, float)) and cfp_close < now_ms:
+        return "cfp_closed"
+    if current_keys is not None and _make_key(ev) not in current_keys:
+        return "missing"
     return None
 
-def merge_and_save(open_cfps, db_path):
+def _feed_keys(keys, active_count, detect_missing):
+    """Keys of the feed for absence-based closing, or None when that check is skipped."""
+    if not detect_missing:
+        return None
+    current = set(keys)
+    if active_count and len(current) < active_count * MIN_FEED_RATIO:
+        print(f"WARNING: feed has {len(current)} events for {active_count} active records; "
+              "looks empty or truncated, not closing missing records")
+        return None
+    return current
+
+def _mark_closed(ev, reason):
+    ev["closed_reason"] = reason
+    ev["archived_at"] = datetime.now(timezone.utc).isoformat()
+
+def merge_and_save(open_cfps, db_path, skip_unchanged=False, detect_missing=True):
     """
     - Add new events
     - Update source fields for existing events (incl. source_tags)
     - Maintain created_at / updated_at timestamps
+    - Close records whose CFP date passed or (with detect_missing, i.e. when open_cfps
+      is the full feed) that are absent from the feed, moving them to the archive tier;
+      an empty or truncated feed (see MIN_FEED_RATIO) closes nothing as missing
+    - Fold fuzzy duplicates (see dedup) into their oldest record and route feed items that
+      match a folded or stored record to it; decisions go to the merge map next to the DB
+    SQLite paths (see sqlite_store.SQLITE_SUFFIXES) are merged in place through indexes.
+    With skip_unchanged, a merge whose input and DB file are identical to the last
+    merge is skipped entirely (result has "unchanged": True).
     """
-    db = load_db(db_path)
+    fingerprint = None
+    if skip_unchanged:
+        fingerprint = _input_fingerprint(open_cfps)
+        last = _load_merge_state().get(os.path.abspath(db_path))
+        if last and last.get("input") == fingerprint and last.get("db") == _db_signature(db_path):
+            return {"added": [], "updated": [], "closed": [], "count": last.get("count", 0), "unchanged": True}
 
-    def make_key(e):
-        return f"{e.get('name','').strip()}|{e.get('hyperlink','').strip()}"
+    result = _merge(open_cfps, db_path, detect_missing)
+    if fingerprint is not None:
+        _save_merge_state(db_path, fingerprint, result["count"])
+    return result
 
-    existing = {make_key(e): e for e in db}
-    current  = {make_key(e): e for e in open_cfps}
+def _merge(open_cfps, db_path, detect_missing):
+    merge_map = dedup.MergeMap.load(dedup.merge_map_path(db_path))
+    if sqlite_store.is_sqlite_path(db_path):
+        result = _merge_and_save_sqlite(open_cfps, db_path, detect_missing, merge_map)
+    else:
+        result = _merge_and_save_json(open_cfps, db_path, detect_missing, merge_map)
+    merge_map.save()
+    return result
 
-    added, updated, closed = [], [], []
+def _fold_duplicates(records, merge_map):
+    """
+    Find duplicate clusters among stored records and fold each into its oldest record:
+    the others are recorded as aliases in merge_map and their positions returned, for the
+    caller to close and archive.
+    """
+    folded = []
+    for cluster in dedup.find_duplicates(records):
+        # Oldest record first; created_at ties keep the DB order
+        cluster.sort(key=lambda c: (records[c[0]].get("created_at") or "", c[0]))
+        canonical = records[cluster[0][0]]
+        for pos, reason in cluster[1:]:
+            _add_alias(merge_map, records[pos], canonical, reason or "similar_name")
+            folded.append(pos)
+    return sorted(folded)
 
-    # Add or update events that are currently open
+def _add_alias(merge_map, alias, canonical, reason):
+    merge_map.add(
+        _make_key(alias), _make_key(canonical),
+        normalize_url(alias.get("hyperlink")), normalize_url(canonical.get("hyperlink")),
+        reason,
+    )
+
+# Fields that identify a stored record; feed values never replace them
+_IDENTITY_FIELDS = ("external_id",)
+
+def _tag_key(ev, k):
+    ev["external_id"] = f"{k}::{dedup.event_tag(ev)}"
+    return ev["external_id"]
+
+def _disambiguate(records):
+    """
+    Records sharing an external_id but describing different events (dedup.different_events,
+    e.g. one location page per city whose URLs differ only in the query string) each get
+    the id suffixed with dedup.event_tag, so none of them overwrites another.
+    Returns the records whose external_id changed.
+    """
+    by_key = {}
+    for ev in records:
+        by_key.setdefault(_make_key(ev), []).append(ev)
+    changed = []
+    for k, group in by_key.items():
+        if len(group) < 2:
+            continue
+        events = []
+        for ev in group:
+            same = next((e for e in events if not dedup.different_events(e[0], ev)), None)
+            if same is None:
+                events.append([ev])
+            else:
+                same.append(ev)
+        if len(events) < 2:
+            continue
+        for same in events:
+            for ev in same:
+                _tag_key(ev, k)
+                changed.append(ev)
+    return changed
+
+def _resolve_key(item, existing, merge_map, matcher):
+    """
+    Primary key of the stored record a feed item belongs to: its own external_id, a known
+    alias from the merge map, or a match in the alias index (same URL and start day, same
+    name on another URL, near-identical name on the same site), then recorded in the map.
+    A stored record in another country is never the match: an item whose own external_id
+    belongs to one gets a tagged id (see _disambiguate). Falls back to its own key (a new record).
+    """
+    k = _make_key(item)
+    if k in existing and dedup.countries_differ(item, existing[k]):
+        k = _tag_key(item, k)
+    if k in existing:
+        return k
+    resolved = merge_map.resolve(k)
+    if resolved in existing and not dedup.countries_differ(item, existing[resolved]):
+        return resolved
+    found = matcher.match(item)
+    if found is None:
+        return k
+    record, reason = found
+    _add_alias(merge_map, item, record, reason)
+    return _make_key(record)
+
+def _resolve_keys(open_cfps, known, merge_map, matcher):
+    """
+    Resolve every feed item up front (see _resolve_key), after tagging the external_ids
+    shared by different feed events; an item may match a new record added by an earlier
+    item. `known` ({key: stored record}) is extended with the new ones.
+    """
+    _disambiguate(open_cfps)
+    keys = []
     for item in open_cfps:
-        k = make_key(item)
+        k = _resolve_key(item, known, merge_map, matcher)
+        if k not in known:
+            known[k] = item
+            matcher.add(item)
+        keys.append(k)
+    return keys
+
+def _group_by_key(open_cfps, keys):
+    """
+    Collapse feed items resolving to the same record into one item, later non-empty values
+    winning as when applied in turn, so duplicates in the feed update a record once
+    instead of flipping its fields back and forth. The first item keeps its identity.
+    The hyperlink comes from an item under the record's own key when there is one, so an
+    event listed on two sites keeps its URL; otherwise from the last (moved) item.
+    Different events never share a key here: _resolve_keys tags their external_ids first.
+    """
+    grouped, own_url = {}, set()
+    for item, k in zip(open_cfps, keys):
+        own = _make_key(item) == k
+        if k not in grouped:
+            grouped[k] = item
+            if own:
+                own_url.add(k)
+            continue
+        if grouped[k] is not item:
+            grouped[k] = dict(grouped[k])
+        grouped[k].update((f, v) for f, v in item.items()
+                          if v is not None and f not in _IDENTITY_FIELDS and f != "hyperlink")
+        if item.get("hyperlink") and (own or k not in own_url):
+            grouped[k]["hyperlink"] = item["hyperlink"]
+            if own:
+                own_url.add(k)
+    return grouped
+
+def _merge_and_save_json(open_cfps, db_path, detect_missing, merge_map):
+    db = load_db(db_path)
+
+    with metrics.span("dedup"):
+        # Records stored under a shared external_id before ids were tagged are rekeyed once
+        retagged = _disambiguate(db)
+        dropped = set(_fold_duplicates(db, merge_map))
+        folded = [ev for pos, ev in enumerate(db) if pos in dropped]
+        for ev in folded:
+            _mark_closed(ev, "duplicate")
+        if dropped:
+            db = [ev for pos, ev in enumerate(db) if pos not in dropped]
+        existing = {_make_key(e): e for e in db}
+        matcher = dedup.Matcher(db)
+        keys = _resolve_keys(open_cfps, dict(existing), merge_map, matcher)
+
+    added, updated, closed = [], [], [ev.get("name") for ev in folded]
+    # Records created or changed by this merge; only these get backfilled and saved.
+    # Historical records are normalized once by migrate_db().
+    dirty = [ev for ev in retagged if _make_key(ev) in existing]
+
+    # Add or update events that are currently open
+    for k, item in _group_by_key(open_cfps, keys).items():
         if k in existing:
-            ev = existing[k]
-            # Update only source-driven fields (do NOT overwrite team-managed fields)
-            # Update source-driven fields
-            if item.get("cfp_url") is not None:
-                ev["cfp_url"] = item["cfp_url"]
-            if item.get("location") is not None:
-                ev["location"] = item["location"]
-            if item.get("city") is not None:
-                ev["city"] = item["city"]
-            if item.get("country") is not None:
-                ev["country"] = item["country"]
-            if item.get("source") is not None:
-                ev["source"] = item["source"]
-            if item.get("source_tags") is not None:
-                ev["source_tags"] = item["source_tags"]
-            if item.get("external_id") is not None:
-                ev["external_id"] = item["external_id"]
-            # Dates: keep epoch ms, add readable mirror fields
-            if item.get("cfp_close") is not None:
-                ev["cfp_close"] = item["cfp_close"]
-                ev["cfp_close_date"] = _to_date_str(item["cfp_close"])
-            if item.get("event_start") is not None:
-                ev["event_start"] = item["event_start"]
-                ev["event_start_date"] = _to_date_str(item["event_start"])
-            if item.get("event_end") is not None:
-                ev["event_end"] = item["event_end"]
-                ev["event_end_date"] = _to_date_str(item["event_end"])
-            # Ensure we backfill external_id if missing
-            if not ev.get("external_id"):
-                ev["external_id"] = _compute_external_id(ev)
-            # Touch updated_at timestamp
-            ev["updated_at"] = datetime.now(timezone.utc).isoformat()
-            updated.append(item.get("name"))
+            if _apply_update(existing[k], item):
+                dirty.append(existing[k])
+                updated.append(item.get("name"))
         else:
             # New event
-            item.setdefault("source_tags", [])
-            # Ensure external_id exists for new items even if upstream missed it
-            if not item.get("external_id"):
-                item["external_id"] = _compute_external_id(item)
-            # Initialize timestamps; do NOT add team-managed fields
-            now_iso = datetime.now(timezone.utc).isoformat()
-            item["created_at"] = now_iso
-            item["updated_at"] = now_iso
-            # Dates: keep epoch ms, add readable mirror fields
-            if item.get("cfp_close") is not None:
-                item["cfp_close_date"] = _to_date_str(item.get("cfp_close"))
-            if item.get("event_start") is not None:
-                item["event_start_date"] = _to_date_str(item.get("event_start"))
-            if item.get("event_end") is not None:
-                item["event_end_date"] = _to_date_str(item.get("event_end"))
+            _init_new(item)
             db.append(item)
+            dirty.append(item)
             added.append(item.get("name"))
 
-    # Global backfill: ensure every record has an external_id before saving
+    # Backfill: ensure every touched record has an external_id before saving
+    for ev in dirty:
+        _backfill(ev)
+
+    # Closed detection: move inactive records to the archive tier
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    current_keys = _feed_keys(keys, len(existing), detect_missing)
+    active, gone = [], list(folded)
     for ev in db:
-        if not ev.get("external_id"):
-            ev["external_id"] = _compute_external_id(ev)
-        # Ensure timestamps exist
-        if not ev.get("created_at"):
-            ev["created_at"] = datetime.now(timezone.utc).isoformat()
-        if not ev.get("updated_at"):
-            ev["updated_at"] = ev["created_at"]
-        # Ensure mirror date fields exist
-        if ev.get("cfp_close") is not None:
-            ev["cfp_close_date"] = _to_date_str(ev.get("cfp_close"))
-        if ev.get("event_start") is not None:
-            ev["event_start_date"] = _to_date_str(ev.get("event_start"))
-        if ev.get("event_end") is not None:
-            ev["event_end_date"] = _to_date_str(ev.get("event_end"))
-
-    save_db(db_path, db)
+        reason = _closed_reason(ev, now_ms, current_keys)
+        if reason:
+            _mark_closed(ev, reason)
+            gone.append(ev)
+            closed.append(ev.get("name"))
+        else:
+            active.append(ev)
+    with metrics.span("save"):
+        if gone:
+            # Archive first so a crash never loses records (at worst they are archived twice)
+            archive.append_records(db_path, gone)
+            db = active
+
+        if dirty or gone or not os.path.exists(db_path):
+            save_db(db_path, db)
+    metrics.incr("duplicates_folded", len(folded))
     return {"added": added, "updated": updated, "closed": closed, "count": len(db)}
+
+def _sqlite_row(ev):
+    return {
+        "merge_key": _make_key(ev),
+        "external_id": ev.get("external_id"),
+        "url_key": normalize_url(ev.get("hyperlink")),
+        "cfp_close": ev.get("cfp_close"),
+        "record": ev,
+    }
+
+def _merge_and_save_sqlite(open_cfps, db_path, detect_missing=True, merge_map=None):
+    """
+    Same semantics as the JSON merge, but only the identity fields of the stored rows (for
+    dedup) and the records matching today's feed are decoded, and all writes happen in
+    one transaction.
+    """
+    if merge_map is None:
+        merge_map = dedup.MergeMap()
+    conn = sqlite_store.connect(db_path)
+    try:
+        with metrics.span("dedup"):
+            stubs = sqlite_store.load_identities(conn)
+            # Rows stored under a shared external_id before ids were tagged are rekeyed once
+            changed = {id(stub) for stub in _disambiguate([stub for _, _, stub in stubs])}
+            retagged = {row_id: stub["external_id"] for row_id, _, stub in stubs if id(stub) in changed}
+            # Rows keyed before external_id became the merge key get their key column updated once
+            rekeyed = [(row_id, _make_key(stub)) for row_id, key, stub in stubs if key != _make_key(stub)]
+            if rekeyed:
+                sqlite_store.set_merge_keys(conn, rekeyed)
+            stubs = [(row_id, stub) for row_id, _, stub in stubs]
+            folded_ids = {stubs[pos][0] for pos in _fold_duplicates([stub for _, stub in stubs], merge_map)}
+            kept = [(row_id, stub) for row_id, stub in stubs if row_id not in folded_ids]
+            row_ids = {_make_key(stub): row_id for row_id, stub in kept}
+            matcher = dedup.Matcher(stub for _, stub in kept)
+            keys = _resolve_keys(open_cfps, {_make_key(stub): stub for _, stub in kept}, merge_map, matcher)
+        retagged = {row_id: eid for row_id, eid in retagged.items() if row_id not in folded_ids}
+        existing = sqlite_store.find_by_ids(conn, [row_ids[k] for k in keys if k in row_ids] + list(retagged))
+        added, updated, closed = [], [], []
+        touched = {}
+        for row_id, eid in retagged.items():
+            existing[row_id]["external_id"] = eid
+            touched[row_id] = existing[row_id]
+        inserts = {}
+        for k, item in _group_by_key(open_cfps, keys).items():
+            if k in row_ids:
+                row_id = row_ids[k]
+                ev = existing[row_id]
+                if _apply_update(ev, item):
+                    _backfill(ev)
+                    touched[row_id] = ev
+                    updated.append(item.get("name"))
+            else:
+                _init_new(item)
+                _backfill(item)
+                inserts[k] = item
+                added.append(item.get("name"))
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        current_keys = _feed_keys(keys, len(row_ids), detect_missing)
+        gone = []
+        for row_id, ev in sorted(sqlite_store.find_by_ids(conn, folded_ids).items()):
+            _mark_closed(ev, "duplicate")
+            gone.append((row_id, ev))
+            closed.append(ev.get("name"))
+        for row_id, ev in sqlite_store.find_closed(conn, now_ms, current_keys):
+            if row_id in folded_ids:
+                continue
+            # Rows updated above are judged on their new values, not the stored ones
+            ev = touched.get(row_id, ev)
+            reason = _closed_reason(ev, now_ms, current_keys)
+            if reason:
+                touched.pop(row_id, None)
+                _mark_closed(ev, reason)
+                gone.append((row_id, ev))
+                closed.append(ev.get("name"))
+        with metrics.span("save"):
+            if gone:
+                archive.append_records(db_path, [ev for _, ev in gone])
+            sqlite_store.write_rows(
+                conn,
+                [(row_id, _sqlite_row(ev)) for row_id, ev in touched.items()],
+                [_sqlite_row(ev) for ev in inserts.values()],
+                [row_id for row_id, _ in gone],
+            )
+        total = sqlite_store.count(conn)
+    finally:
+        conn.close()
+    metrics.incr("duplicates_folded", len(folded_ids))
+    return {"added": added, "updated": updated, "closed": closed, "count": total}
+
+def iter_all_events(db_path, predicate=None, include_archived=True):
+    """
+    Query across both tiers: active records from the DB first, then the archive.
+    `predicate(ev) -> bool` filters records when given.
+    """
+    tiers = [iter_db(db_path)]
+    if include_archived:
+        tiers.append(archive.iter_archived(db_path))
+    for tier in tiers:
+        for ev in tier:
+            if predicate is None or predicate(ev):
+                yield ev
+
+def migrate_db(db_path):
+    """
+    One-time normalization of legacy records (external_id, timestamps, mirror date
+    fields) that regular merges no longer revisit. Returns the number of records changed.
+    """
+    db = load_db(db_path)
+    changed = []
+    for ev in db:
+        before = dict(ev)
+        _backfill(ev)
+        if ev != before:
+            changed.append(ev)
+    if not changed:
+        return 0
+    if sqlite_store.is_sqlite_path(db_path):
+        # Rewrite the whole store in insertion order
+        conn = sqlite_store.connect(db_path)
+        try:
+            sqlite_store.write_rows(conn, [], [_sqlite_row(ev) for ev in db], replace_all=True)
+        finally:
+            conn.close()
+    else:
+        save_db(db_path, db)
+    return len(changed)
+
+def import_json(json_path, db_path):
+    """Seed (or refresh) a SQLite or JSONL store from a JSON DB file. Returns the number of records."""
+    records = load_db(json_path)
+    for ev in records:
+        _backfill(ev)
+    if not sqlite_store.is_sqlite_path(db_path):
+        save_db(db_path, records)
+        return len(records)
+    conn = sqlite_store.connect(db_path)
+    try:
+        sqlite_store.write_rows(conn, [], [_sqlite_row(ev) for ev in records], replace_all=True)
+    finally:
+        conn.close()
+    return len(records)
+
+def export_json(db_path, json_path):
+    """Write a SQLite or JSONL store as the pretty-printed JSON file. Returns the number of records."""
+    if sqlite_store.is_sqlite_path(db_path):
+        return sqlite_store.export_json(db_path, json_path)
+    records = load_db(db_path)
+    save_db(json_path, records)
+    return len(records)
@@ -0,0 +1,128 @@
+import os, re, json, time, threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# Process-wide stage timings and counters, shared by all threads.
+# Spans may nest (e.g. save runs inside merge) and are summed across worker threads,
+# so stage totals can exceed the wall-clock duration.
+_LOCK = threading.Lock()
+_SPANS = {}      # name -> [seconds, calls]
+_COUNTERS = {}   # (name, ((label, value), ...)) -> value
+
+PROMETHEUS_SUFFIXES = (".prom", ".txt")
+# Path segments that look like ids (Notion UUIDs, page-000123, ...) are folded into {id}
+_ID_SEGMENT_RE = re.compile(r"^(?=.*\d)[\w-]{8,}$")
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block and add it to the `name` stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _LOCK:
+            entry = _SPANS.setdefault(name, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def incr(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + value
+
+
+def reset():
+    with _LOCK:
+        _SPANS.clear()
+        _COUNTERS.clear()
+
+
+def counter_total(name):
+    """Sum of a counter over all label sets."""
+    with _LOCK:
+        return sum(v for (n, _), v in _COUNTERS.items() if n == name)
+
+
+def endpoint_label(method, url):
+    """'GET host/path' with id-like path segments replaced, to keep label cardinality low."""
+    parts = urlsplit(url)
+    segments = ["{id}" if _ID_SEGMENT_RE.match(s) else s for s in parts.path.split("/")]
+    return f"{method} {parts.netloc}{'/'.join(segments)}"
+
+
+def snapshot():
+    with _LOCK:
+        spans = {name: {"seconds": round(s, 6), "calls": n} for name, (s, n) in _SPANS.items()}
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_COUNTERS.items())
+        ]
+    return {"spans": spans, "counters": counters}
+
+
+def summary_lines():
+    """Human-readable '| stage: 1.23s' lines plus HTTP / cache totals."""
+    snap = snapshot()
+    lines = [f"| {name}: {s['seconds']:.2f}s ({s['calls']}x)" for name, s in snap["spans"].items()]
+    requests_total = counter_total("http_requests")
+    if requests_total:
+        received = counter_total("http_bytes_received")
+        lines.append(f"| http requests: {requests_total} ({received / 1024:.0f} KiB received, {counter_total('http_retries')} retries)")
+    hits, misses = counter_total("cache_hits"), counter_total("cache_misses")
+    if hits or misses:
+        lines.append(f"| cache: {hits} hits, {misses} misses")
+    return lines
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def to_prometheus(snap, prefix="cfp_", extra=None):
+    """Prometheus text exposition of a snapshot (plus numeric `extra` values as gauges)."""
+    out = [
+        f"# TYPE {prefix}stage_seconds gauge",
+        *(f'{prefix}stage_seconds{{stage="{name}"}} {s["seconds"]}' for name, s in snap["spans"].items()),
+        f"# TYPE {prefix}stage_calls gauge",
+        *(f'{prefix}stage_calls{{stage="{name}"}} {s["calls"]}' for name, s in snap["spans"].items()),
+    ]
+    by_name = {}
+    for c in snap["counters"]:
+        by_name.setdefault(c["name"], []).append(c)
+    for name, items in by_name.items():
+        out.append(f"# TYPE {prefix}{name}_total counter")
+        out.extend(f"{prefix}{name}_total{_prom_labels(c['labels'])} {c['value']}" for c in items)
+    for key, value in (extra or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            out.append(f"# TYPE {prefix}{key} gauge")
+            out.append(f"{prefix}{key} {value}")
+    return "\n".join(out) + "\n"
+
+
+def write(path, job, extra=None):
+    """
+    Write the current metrics to `path`: Prometheus text for .prom/.txt, JSON otherwise.
+    `extra` holds run-level values (duration, record counts, ...).
+    """
+    snap = snapshot()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        if path.lower().endswith(PROMETHEUS_SUFFIXES):
+            f.write(to_prometheus(snap, prefix=f"{job}_", extra=extra))
+        else:
+            json.dump({
+                "job": job,
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "run": extra or {},
+                **snap,
+            }, f, indent=2)
+    os.replace(tmp, path)
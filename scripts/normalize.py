@@ -0,0 +1,124 @@
+"""
+Normalization shared by fetch_data, merge_diff, sync_notion and main.
+Patterns are compiled once and URL/date conversions are memoized, since the same
+values are normalized for every record on every run.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+# Strings starting with YYYY-MM-DD: the first 10 chars are already the answer
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%SZ")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MS_PER_DAY = 86_400_000
+_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_component(text):
+    text = _WHITESPACE_RE.sub(" ", text.strip().lower())
+    return _NON_ALNUM_RE.sub("-", text).strip("-")
+
+
+def normalize_component(value):
+    """
+    Normalize a component for external_id:
+    - Lowercase
+    - Trim whitespace
+    - Collapse spaces and non-alphanumerics to single hyphens
+    - Return empty string if falsy
+    """
+    if not value:
+        return ""
+    return _normalize_component(str(value))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _normalize_url(text):
+    try:
+        parts = urlsplit(text.strip())
+        scheme = (parts.scheme or "https").lower()
+        netloc = (parts.netloc or "").lower()
+        path = (parts.path or "").rstrip("/")
+        return f"{scheme}://{netloc}{path}"
+    except Exception:
+        text = text.strip().lower()
+        text = text.split("?", 1)[0].split("#", 1)[0]
+        return text.rstrip("/")
+
+
+def normalize_url(url):
+    """
+    Normalize URLs for matching and ID stability:
+    - lowercase scheme/host
+    - drop query/fragment (including utm params)
+    - remove trailing slash from path
+    """
+    if not url:
+        return ""
+    return _normalize_url(str(url))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _epoch_ms_to_date(ms):
+    return (_EPOCH + timedelta(days=ms // _MS_PER_DAY)).strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_date_str(value):
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    # Fallback: pass through if looks like date
+    return value[:10] if len(value) >= 10 else value
+
+
+def to_date_str(value):
+    """
+    Convert epoch ms (int/float or digit string) or an ISO-like string to YYYY-MM-DD.
+    Returns None for None/unknown types.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return _epoch_ms_to_date(int(value))
+        except (OverflowError, ValueError):
+            return None
+    if isinstance(value, str):
+        if value.isdigit():
+            # isdigit() also accepts digits int() rejects ("²"); huge values overflow the date
+            try:
+                return _epoch_ms_to_date(int(value))
+            except (OverflowError, ValueError):
+                return None
+        if _ISO_DATE_RE.match(value):
+            return value[:10]
+        return _parse_date_str(value)
+    return None
+
+
+def build_external_id(source, hyperlink, event_start):
+    """
+    Build a stable external_id:
+    Format: {source}::{normalized_hyperlink}::{event_start}
+    - Prefer stable hyperlink over name/city
+    - event_start is included to disambiguate rare cases of reused URLs
+    """
+    parts = [
+        normalize_component(source),
+        normalize_component(normalize_url(hyperlink)),
+        str(event_start or ""),
+    ]
+    return "::".join(parts)
+
+
+def compute_external_id(ev):
+    """external_id for a stored/cleaned event dict."""
+    return build_external_id(ev.get("source"), ev.get("hyperlink"), ev.get("event_start"))
@@ -0,0 +1,328 @@
+"""
+asyncio counterpart of the Notion calls in sync_notion: database queries (with pipelined
+pagination), get database / page, create, update, mark closed and archive, plus
+upsert_events and reconcile_missing built on them (`python -m scripts.sync_notion --async`).
+
+Requests go through the same pooled keep-alive session as the blocking client (HTTP/1.1,
+up to HTTP_POOL_SIZE connections), driven from a thread pool of the same size, so that many
+calls are in flight while the event loop schedules the rest. Every call waits on one
+global AsyncRateLimiter: a large sync then runs at the configured rate instead of
+one round trip at a time.
+Page bodies, matching and the ledger are shared with sync_notion, so both modes write the same;
+settings and the schema cache come from notion_config.CONFIG.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from scripts import dedup, metrics
+from scripts import sync_notion as sn
+from scripts.http_client import HTTP_POOL_SIZE, get_session
+from scripts.notion_config import CONFIG
+from scripts.sync_state import SyncLedger
+
+POOL_SIZE = HTTP_POOL_SIZE
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket shared by every coroutine of the event loop.
+    Callers reserve a token, then sleep until it is due, so concurrent tasks together
+    run at (not below) the configured rate.
+    """
+
+    def __init__(self, rps: float, burst: float = 1.0) -> None:
+        self.rate = max(rps, 0.1)
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        # No lock needed: nothing awaits between reading and updating the bucket
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+_RATE_LIMITER = AsyncRateLimiter(2.5)
+
+
+def configure_rate_limit(rps: float) -> None:
+    global _RATE_LIMITER
+    _RATE_LIMITER = AsyncRateLimiter(rps)
+
+
+async def _in_pool(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call (HTTP I/O, schema load) on the I/O thread pool."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="notion-io")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+def close() -> None:
+    """Stop the I/O threads (the pooled session itself is shared and stays open)."""
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=True)
+        _EXECUTOR = None
+
+
+async def notion_request(method: str, path: str, **kwargs: Any) -> requests.Response:
+    """
+    Async sync_notion.notion_request: rate-limited, 429 waits for Retry-After, 5xx and
+    connection errors retry with jittered backoff (creates: only 429 and connect timeouts),
+    other 4xx raise requests.HTTPError.
+    """
+    idempotent = sn._idempotent(method, path)
+    with metrics.span(sn._notion_stage(method, path)):
+        for attempt in range(sn.MAX_RETRIES + 1):
+            await _RATE_LIMITER.acquire()
+            try:
+                # Retries are handled here (429/Retry-After aware), so the pooled session must not retry
+                session = get_session("notion", retries=0)
+                r = await _in_pool(
+                    session.request, method, f"{CONFIG.base_url}{path}", headers=sn.notion_headers(), **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= sn.MAX_RETRIES or not sn._retry_error(e, idempotent):
+                    raise
+                metrics.incr("http_retries", reason="connection")
+                await asyncio.sleep(sn._backoff_delay(attempt))
+                continue
+            if attempt < sn.MAX_RETRIES:
+                if r.status_code == 429:
+                    metrics.incr("http_retries", reason="429")
+                    delay = sn._retry_after(r)
+                    await asyncio.sleep(delay if delay is not None else sn._backoff_delay(attempt))
+                    continue
+                if r.status_code >= 500 and idempotent:
+                    metrics.incr("http_retries", reason="5xx")
+                    await asyncio.sleep(sn._backoff_delay(attempt))
+                    continue
+            r.raise_for_status()
+            return r
+    raise RuntimeError("unreachable")
+
+
+async def load_schema() -> Dict[str, Any]:
+    """Warm sync_notion's schema cache once, off the event loop; page bodies read it."""
+    return await _in_pool(sn.get_database_properties)
+
+
+async def get_database() -> Dict[str, Any]:
+    r = await notion_request("GET", f"/databases/{CONFIG.database_id}")
+    return r.json()
+
+
+async def get_page(page_id: str) -> Optional[dict]:
+    try:
+        r = await notion_request("GET", f"/pages/{page_id}")
+    except requests.HTTPError as e:
+        if getattr(e.response, "status_code", None) in (400, 404):
+            return None
+        raise
+    page = r.json()
+    return None if page.get("archived") else page
+
+
+async def query_database(payload: Dict[str, Any], params: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Any]:
+    """One page of database query results (the raw response body)."""
+    r = await notion_request("POST", f"/databases/{CONFIG.database_id}/query", json=payload, params=params)
+    return r.json()
+
+
+async def iter_database_pages(
+    payload: Optional[Dict[str, Any]] = None,
+    properties: Optional[List[str]] = None,
+) -> AsyncIterator[dict]:
+    """
+    Async sync_notion.iter_database_pages with pipelined pagination: the query for the next
+    cursor is sent as soon as a response is parsed, so it is in flight while the caller
+    processes the current 100 results.
+    """
+    payload = dict(payload or {})
+    payload["page_size"] = 100
+    params = await _in_pool(sn._filter_params, properties) if properties else None
+
+    def fetch(cursor: Optional[str]) -> asyncio.Task:
+        body = dict(payload, start_cursor=cursor) if cursor else payload
+        return asyncio.ensure_future(query_database(body, params))
+
+    pending: Optional[asyncio.Task] = fetch(None)
+    try:
+        while pending is not None:
+            data = await pending
+            cursor = data.get("next_cursor") if data.get("has_more") else None
+            pending = fetch(cursor) if cursor else None
+            for p in data.get("results", []):
+                yield p
+    finally:
+        # The caller stopped early (or failed): do not leave a prefetch running
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+async def build_page_index(rps: Optional[float] = None) -> sn.PageIndex:
+    """Async sync_notion.build_page_index (with rps, the async limiter is configured first)."""
+    if rps is not None:
+        configure_rate_limit(rps)
+    await load_schema()
+    index = sn.PageIndex()
+    async for p in iter_database_pages():
+        index.add(p)
+    return index
+
+
+async def list_all_pages_with_url(skip_closed: bool = False) -> List[Dict[str, str]]:
+    """Async sync_notion.list_all_pages_with_url."""
+    await load_schema()
+    pages: List[Dict[str, str]] = []
+    async for p in iter_database_pages(sn._listing_payload(skip_closed), properties=sn.LISTING_PROPERTIES):
+        listed = sn._listed_page(p, skip_closed)
+        if listed:
+            pages.append(listed)
+    return pages
+
+
+async def create_page(ev: Dict[str, Any], dry_run: bool = False) -> Optional[dict]:
+    body = sn.build_create_body(ev)
+    if dry_run:
+        print(f"[DRY-RUN] CREATE: {ev.get('name')} ({sn.normalize_url(ev.get('hyperlink') or '')})")
+        return None
+    r = await notion_request("POST", "/pages", json=body)
+    return r.json()
+
+
+async def update_page(page_id: str, ev: Dict[str, Any], dry_run: bool = False, existing_page: Optional[dict] = None) -> bool:
+    """Async sync_notion.update_page; returns True if an update was sent (or would be, in dry-run)."""
+    body = sn.build_update_body(ev, existing_page)
+    if body is None:
+        return False
+    if dry_run:
+        print(f"[DRY-RUN] UPDATE: {ev.get('name')} ({sn.normalize_url(ev.get('hyperlink') or '')})")
+        return True
+    await notion_request("PATCH", f"/pages/{page_id}", json=body)
+    return True
+
+
+async def mark_page_closed(page_id: str, dry_run: bool = False) -> None:
+    body = sn.build_closed_body()
+    if dry_run:
+        print(f"[DRY-RUN] MARK CLOSED: {page_id}")
+        return
+    await notion_request("PATCH", f"/pages/{page_id}", json=body)
+
+
+async def archive_page(page_id: str, dry_run: bool = False) -> None:
+    if dry_run:
+        print(f"[DRY-RUN] ARCHIVE MISSING: {page_id}")
+        return
+    await notion_request("PATCH", f"/pages/{page_id}", json={"archived": True})
+
+
+async def _upsert_event(
+    ev: Dict[str, Any],
+    dry_run: bool,
+    index: sn.PageIndex,
+    ledger: Optional[SyncLedger] = None,
+    full_sync: bool = False,
+    merge_map: Optional[dedup.MergeMap] = None,
+) -> Optional[Tuple[str, Dict[str, str]]]:
+    # With the snapshot index, planning is local: only the writes below go to Notion
+    plan = sn._plan_upsert(ev, index, ledger, full_sync, merge_map)
+    if plan is None:
+        return None
+    if plan["skip"]:
+        return "unchanged", plan["row"]
+    closes = [mark_page_closed(page_id) for page_id, reason, detail in plan["close"]
+              if sn._close_duplicate(reason, detail, dry_run)]
+    if closes:
+        await asyncio.gather(*closes)
+    page = plan["page"]
+    if page:
+        changed = await update_page(page["id"], ev, dry_run=dry_run, existing_page=page)
+        return sn._finish_upsert(plan, "updated" if changed else "unchanged", page, dry_run, index, ledger)
+    new_page = await create_page(ev, dry_run=dry_run)
+    return sn._finish_upsert(plan, "created", new_page, dry_run, index, ledger)
+
+
+async def _bounded(tasks: List[Callable[[], Any]], concurrency: int) -> None:
+    """Await the coroutine factories with at most `concurrency` running at once."""
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(task: Callable[[], Any]) -> None:
+        async with semaphore:
+            await task()
+
+    await asyncio.gather(*(run(t) for t in tasks))
+
+
+async def upsert_events(
+    events: List[Dict[str, Any]],
+    limit: Optional[int],
+    dry_run: bool,
+    rps: float,
+    index: sn.PageIndex,
+    concurrency: int = POOL_SIZE,
+    ledger: Optional[SyncLedger] = None,
+    full_sync: bool = False,
+    merge_map: Optional[dedup.MergeMap] = None,
+) -> Dict[str, Any]:
+    """
+    Async sync_notion.upsert_events. Matching always uses the snapshot index, so the only
+    Notion calls are the writes; up to `concurrency` URL groups are written at once.
+    """
+    configure_rate_limit(rps)
+    await load_schema()
+    selected = events[:limit] if limit is not None else list(events)
+    outcomes: List[Optional[Tuple[str, Dict[str, str]]]] = [None] * len(selected)
+
+    def make_task(positions: List[int]) -> Callable[[], Any]:
+        async def task() -> None:
+            # Events sharing a URL run in order, so the first creates the page the next updates
+            for pos in positions:
+                outcomes[pos] = await _upsert_event(selected[pos], dry_run, index, ledger, full_sync, merge_map)
+                if ledger is not None:
+                    ledger.checkpoint()
+        return task
+
+    await _bounded([make_task(g) for g in sn._group_by_url(selected).values()], concurrency)
+    return sn._upsert_summary(selected, outcomes)
+
+
+async def reconcile_missing(
+    current_url_keys: set[str],
+    dry_run: bool,
+    rps: float,
+    archive: bool,
+    concurrency: int = POOL_SIZE,
+    ledger: Optional[SyncLedger] = None,
+    keep_page_ids: Optional[set[str]] = None,
+) -> Dict[str, int]:
+    """Async sync_notion.reconcile_missing."""
+    configure_rate_limit(rps)
+    pages = await list_all_pages_with_url(skip_closed=not archive)
+    missing = sn._missing_pages(pages, current_url_keys, keep_page_ids)
+
+    def make_task(page_id: str) -> Callable[[], Any]:
+        if archive:
+            return lambda: archive_page(page_id, dry_run=dry_run)
+        return lambda: mark_page_closed(page_id, dry_run=dry_run)
+
+    await _bounded([make_task(p["page_id"]) for p in missing], concurrency)
+    if ledger is not None and not dry_run:
+        ledger.forget_pages(p["page_id"] for p in missing)
+    return {"scanned": len(pages), "affected": len(missing)}
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+class NotionConfig:
+    """
+    Notion settings and process-wide client state (schema cache, rate limiter).
+    Shared by scripts.sync_notion and scripts.notion_async through CONFIG, so they agree
+    even when sync_notion runs as __main__ and notion_async imports a second copy of it.
+    """
+
+    def __init__(self) -> None:
+        self.api_token: Optional[str] = os.getenv("NOTION_API_TOKEN")
+        self.database_id: Optional[str] = os.getenv("NOTION_DATABASE_ID")
+        self.version = "2022-06-28"
+        self.base_url = os.getenv("NOTION_BASE_URL") or "https://api.notion.com/v1"
+        # Optional on-disk copy of the schema (set from --schema-cache) and its max age in seconds
+        self.schema_cache_path: Optional[str] = None
+        self.schema_cache_ttl = 3600.0
+        self.db_properties: Optional[Dict[str, Any]] = None
+        self.schema_lock = threading.Lock()
+        # Threaded token bucket (sync_notion.RateLimiter), set by sync_notion.configure_rate_limit()
+        self.rate_limiter: Any = None
+
+
+CONFIG = NotionConfig()
@@ -0,0 +1,55 @@
+import argparse
+import json
+import time
+
+from scripts import event_index
+from scripts.normalize import to_date_str
+
+DAY_MS = 86_400_000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query open CFPs by tag, country and closing window using the DB's inverted index.",
+    )
+    parser.add_argument("--db", default="data/percona_events.json", help="DB path (the index is read from <db stem>.index.json)")
+    parser.add_argument("--tag", action="append", default=[],
+                        help="Tag filter, 'key=value' or bare 'value'; comma-separate alternatives, repeat to require several")
+    parser.add_argument("--country", action="append", default=[], help="Country filter; comma-separate or repeat for alternatives")
+    parser.add_argument("--days", type=float, default=None, help="Only CFPs closing within the next N days")
+    parser.add_argument("--include-closed", action="store_true", help="Also list CFPs whose closing date has passed")
+    parser.add_argument("--limit", type=int, default=50, help="Max rows to print (0 = all)")
+    parser.add_argument("--json", action="store_true", help="Print matches as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = event_index.load(args.db)
+    if index is None:
+        # Missing or older than the DB: rebuild once (this is the only path that reads the DB)
+        index = event_index.build_for_db(args.db)
+    now = int(time.time() * 1000)
+    close_from = None if args.include_closed else now
+    close_to = now + int(args.days * DAY_MS) if args.days is not None else None
+    ids = event_index.query(index, tags=args.tag, countries=[c for spec in args.country for c in spec.split(",") if c.strip()], close_from=close_from, close_to=close_to)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    shown = ids[: args.limit] if args.limit else ids
+    rows = [index["rows"][i] for i in shown]
+    if args.json:
+        keys = ("external_id", "name", "link", "cfp_close", "country")
+        print(json.dumps([dict(zip(keys, r)) for r in rows], ensure_ascii=False, indent=2))
+        return
+
+    cols = [("Name", 44), ("CFP closes", 12), ("Country", 16), ("Link", 64)]
+    print(" | ".join(h.ljust(w) for h, w in cols))
+    print("-+-".join("-" * w for _, w in cols))
+    for _, name, link, close, country in rows:
+        cells = [name or "", to_date_str(close) or "", country or "", link or ""]
+        cells = [c if len(c) <= w else c[: w - 1] + "…" for c, (_, w) in zip(cells, cols)]
+        print(" | ".join(c.ljust(w) for c, (_, w) in zip(cells, cols)).rstrip())
+    more = f" (showing {len(rows)})" if len(rows) < len(ids) else ""
+    print(f"\n{len(ids)} matching CFPs{more} in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
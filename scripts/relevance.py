@@ -0,0 +1,140 @@
+"""
+Relevance score of a CFP for the team: database and open-source events score high.
+
+Keywords are matched against the source_tags values, the event name and the location,
+each with its own weights. All keywords of a field are compiled once into an Aho-Corasick
+automaton, so a text is scanned in a single pass whatever the number of keywords.
+A keyword counts once per field and only as a whole word ("sql" does not match "mysql").
+"""
+from collections import deque
+
+SCORE_FIELD = "relevance_score"
+
+TAG_WEIGHTS = {
+    "mysql": 10, "postgresql": 10, "postgres": 10, "mongodb": 10, "mariadb": 10, "percona": 10,
+    "valkey": 8, "redis": 6, "clickhouse": 6, "sqlite": 6,
+    "databases": 8, "database": 8, "nosql": 6, "sql": 5,
+    "open-source": 6, "opensource": 6, "open source": 6, "foss": 6, "linux": 4,
+    "data": 3, "data-engineering": 3, "big-data": 3, "kubernetes": 3, "cloud-native": 2,
+    "observability": 2, "sre": 2, "devops": 1, "cloud": 1,
+}
+NAME_WEIGHTS = {
+    "percona": 10, "mysql": 10, "postgresql": 10, "postgres": 10, "pgconf": 10, "pgday": 10,
+    "mongodb": 10, "mariadb": 10, "valkey": 8, "redis": 6, "fosdem": 8,
+    "database": 6, "databases": 6, "db": 4, "sql": 5, "sqlsaturday": 5, "nosql": 5, "data": 3,
+    "open source": 6, "opensource": 6, "oss": 5, "linux": 4, "kubecon": 3, "kubernetes": 3,
+    "devops": 1, "devopsdays": 1,
+}
+LOCATION_WEIGHTS = {
+    "online": 1, "remote": 1, "virtual": 1,
+}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords, reporting whole-word matches."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for kw in keywords:
+            self._add(kw.lower())
+        self._link()
+
+    def _add(self, kw):
+        state = 0
+        for ch in kw:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = self._goto[state][ch] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = self._out[state] + (kw,)
+
+    def _link(self):
+        # Breadth-first, so a state's fail link (a shorter suffix) is final before its children's
+        queue = deque(self._goto[0].values())  # depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Set of keywords occurring in text (lowercased) as whole words."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for kw in out[state]:
+                start, end = i - len(kw) + 1, i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    found.add(kw)
+        return found
+
+
+class Scorer:
+    """Weighted keyword scorer with one precompiled automaton per field."""
+
+    def __init__(self, tag_weights=TAG_WEIGHTS, name_weights=NAME_WEIGHTS, location_weights=LOCATION_WEIGHTS):
+        self.fields = [
+            (self._tags_text, tag_weights, KeywordAutomaton(tag_weights)),
+            (lambda ev: ev.get("name") or "", name_weights, KeywordAutomaton(name_weights)),
+            (lambda ev: ev.get("location") or "", location_weights, KeywordAutomaton(location_weights)),
+        ]
+
+    @staticmethod
+    def _tags_text(ev):
+        values = []
+        for tag in ev.get("source_tags") or []:
+            value = tag.get("value") if isinstance(tag, dict) else tag
+            if isinstance(value, str):
+                values.append(value)
+        # A separator that is never part of a keyword keeps tags from running together
+        return " | ".join(values)
+
+    def score(self, ev):
+        total = 0
+        for text_of, weights, automaton in self.fields:
+            text = text_of(ev)
+            if text:
+                total += sum(weights[kw] for kw in automaton.find(text))
+        return total
+
+
+_DEFAULT = None
+
+
+def default_scorer():
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = Scorer()
+    return _DEFAULT
+
+
+def score_event(ev):
+    return default_scorer().score(ev)
+
+
+def score_events(events):
+    """Store the relevance score on each event (in place); returns the events."""
+    scorer = default_scorer()
+    for ev in events:
+        ev[SCORE_FIELD] = scorer.score(ev)
+    return events
+
+
+def event_score(ev):
+    """Stored score, computed on the fly for records merged before scoring existed."""
+    value = ev.get(SCORE_FIELD)
+    return value if isinstance(value, (int, float)) else score_event(ev)
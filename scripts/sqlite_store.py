@@ -0,0 +1,153 @@
+import os, json, sqlite3
+
+from scripts import jsonl_store
+
+# DB paths with these suffixes are stored in SQLite instead of a JSON file
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id          INTEGER PRIMARY KEY,
+    merge_key   TEXT NOT NULL,
+    external_id TEXT,
+    url_key     TEXT,
+    cfp_close   INTEGER,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_merge_key   ON events(merge_key);
+CREATE INDEX IF NOT EXISTS idx_events_external_id ON events(external_id);
+CREATE INDEX IF NOT EXISTS idx_events_url_key     ON events(url_key);
+CREATE INDEX IF NOT EXISTS idx_events_cfp_close   ON events(cfp_close);
+"""
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_BATCH = 500
+
+
+def is_sqlite_path(path):
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def connect(path):
+    """Open (and create if needed) the events store."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def load_all(conn):
+    """All records in insertion order, as dicts."""
+    return [json.loads(data) for (data,) in conn.execute("SELECT data FROM events ORDER BY id")]
+
+
+def iter_all(conn, limit=None):
+    """Records in insertion order, decoded one row at a time (at most `limit`)."""
+    sql, params = "SELECT data FROM events ORDER BY id", ()
+    if limit is not None:
+        sql, params = sql + " LIMIT ?", (limit,)
+    for (data,) in conn.execute(sql, params):
+        yield json.loads(data)
+
+
+# Fields needed to key, block and compare records for duplicate detection (see dedup)
+IDENTITY_FIELDS = ("external_id", "source", "name", "hyperlink", "event_start", "country", "created_at")
+
+
+def load_identities(conn):
+    """
+    [(row_id, merge_key, {field: value})] of every row in insertion order, with only
+    IDENTITY_FIELDS extracted by SQLite, so the full records are never decoded in Python.
+    """
+    columns = ", ".join(f"json_extract(data, '$.{f}')" for f in IDENTITY_FIELDS)
+    found = []
+    for row_id, merge_key, *values in conn.execute(f"SELECT id, merge_key, {columns} FROM events ORDER BY id"):
+        found.append((row_id, merge_key, {f: v for f, v in zip(IDENTITY_FIELDS, values) if v is not None}))
+    return found
+
+
+def set_merge_keys(conn, keys):
+    """Store new merge keys [(row_id, merge_key)] without rewriting the records."""
+    with conn:
+        conn.executemany("UPDATE events SET merge_key=? WHERE id=?", [(key, row_id) for row_id, key in keys])
+
+
+def find_by_ids(conn, row_ids):
+    """Return {row_id: record} for the given row ids."""
+    row_ids = list(set(row_ids))
+    found = {}
+    for i in range(0, len(row_ids), _BATCH):
+        chunk = row_ids[i:i + _BATCH]
+        placeholders = ",".join("?" * len(chunk))
+        for row_id, data in conn.execute(f"SELECT id, data FROM events WHERE id IN ({placeholders})", chunk):
+            found[row_id] = json.loads(data)
+    return found
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def _row_values(row):
+    return (
+        row["merge_key"],
+        row.get("external_id"),
+        row.get("url_key"),
+        row.get("cfp_close") if isinstance(row.get("cfp_close"), int) else None,
+        json.dumps(row["record"], ensure_ascii=False),
+    )
+
+
+def find_closed(conn, now_ms, current_keys=None):
+    """
+    Rows whose CFP closed before now_ms (via the cfp_close index) or, when current_keys
+    is given, whose merge_key is not among them. Returns [(row_id, record)].
+    """
+    found = {}
+    for row_id, data in conn.execute("SELECT id, data FROM events WHERE cfp_close < ?", (now_ms,)):
+        found[row_id] = json.loads(data)
+    if current_keys is not None:
+        wanted = set(current_keys)
+        # Only the key column is scanned; records are decoded for the missing rows alone
+        missing = [row_id for row_id, key in conn.execute("SELECT id, merge_key FROM events")
+                   if key not in wanted and row_id not in found]
+        for i in range(0, len(missing), _BATCH):
+            chunk = missing[i:i + _BATCH]
+            placeholders = ",".join("?" * len(chunk))
+            for row_id, data in conn.execute(f"SELECT id, data FROM events WHERE id IN ({placeholders})", chunk):
+                found[row_id] = json.loads(data)
+    return sorted(found.items())
+
+
+def write_rows(conn, updates, inserts, deletes=(), replace_all=False):
+    """
+    Apply updates [(row_id, row)], inserts [row] and deletes [row_id] in a single transaction.
+    Each row is {'merge_key', 'external_id', 'url_key', 'cfp_close', 'record'}.
+    With replace_all every existing row is deleted first, in the same transaction, so a
+    failed rewrite leaves the previous contents in place.
+    """
+    with conn:
+        if replace_all:
+            conn.execute("DELETE FROM events")
+        conn.executemany("DELETE FROM events WHERE id=?", [(row_id,) for row_id in deletes])
+        conn.executemany(
+            "UPDATE events SET merge_key=?, external_id=?, url_key=?, cfp_close=?, data=? WHERE id=?",
+            [_row_values(row) + (row_id,) for row_id, row in updates],
+        )
+        conn.executemany(
+            "INSERT INTO events (merge_key, external_id, url_key, cfp_close, data) VALUES (?, ?, ?, ?, ?)",
+            [_row_values(row) for row in inserts],
+        )
+
+
+def export_json(sqlite_path, json_path):
+    """Write the store as the committed, pretty-printed JSON file (for git diffs)."""
+    conn = connect(sqlite_path)
+    try:
+        data = load_all(conn)
+    finally:
+        conn.close()
+    # Atomic like save_db: a crash mid-export never truncates the committed file
+    jsonl_store.write_atomic(json_path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+    return len(data)
@@ -2,29 +2,33 @@
 from __future__ import annotations
 
 import os
+import json
+import hashlib
 import time
+import random
 import argparse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
-from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import requests
 
-from scripts.merge_diff import load_db
+from scripts import dedup, metrics, relevance
+from scripts.http_client import get_session
+from scripts.merge_diff import read_db
+from scripts.normalize import normalize_url, to_date_str
+from scripts.notion_config import CONFIG
+from scripts.sync_state import SyncLedger, default_state_path
 
-NOTION_API_TOKEN = os.getenv("NOTION_API_TOKEN")
-NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
-NOTION_VERSION = "2022-06-28"
-NOTION_BASE_URL = "https://api.notion.com/v1"
-
-_DB_PROPERTIES_CACHE: Optional[Dict[str, Any]] = None
 
 
 def require_env() -> None:
     missing = []
-    if not NOTION_API_TOKEN:
+    if not CONFIG.api_token:
         missing.append("NOTION_API_TOKEN")
-    if not NOTION_DATABASE_ID:
+    if not CONFIG.database_id:
         missing.append("NOTION_DATABASE_ID")
     if missing:
         raise SystemExit(
@@ -34,31 +38,148 @@ def require_env() -> None:
 
 def notion_headers() -> Dict[str, str]:
     return {
-        "Authorization": f"Bearer {NOTION_API_TOKEN}",
-        "Notion-Version": NOTION_VERSION,
+        "Authorization": f"Bearer {CONFIG.api_token}",
+        "Notion-Version": CONFIG.version,
         "Content-Type": "application/json",
     }
 
 
-def to_iso_date(value: Any) -> Optional[str]:
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every Notion call.
+    Callers reserve a token and sleep outside the lock until it becomes available,
+    so concurrent workers together run at (not below) the configured rate.
+    """
+
+    def __init__(self, rps: float, burst: float = 1.0) -> None:
+        self.rate = max(rps, 0.1)
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+
+def configure_rate_limit(rps: float) -> None:
+    CONFIG.rate_limiter = RateLimiter(rps)
+
+
+# Default rate, unless another copy of this module (run as __main__) already set one
+if CONFIG.rate_limiter is None:
+    configure_rate_limit(2.5)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after(r: requests.Response) -> Optional[float]:
+    value = r.headers.get("Retry-After")
     if not value:
         return None
     try:
-        # Support epoch ms
-        if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
-            return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
-        # Support already formatted strings like YYYY-MM-DD or ISO8601
-        if isinstance(value, str):
-            for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%SZ"):
-                try:
-                    dt = datetime.strptime(value, fmt)
-                    return dt.strftime("%Y-%m-%d")
-                except Exception:
-                    continue
-            # Fallback: pass through if looks like date
-            return value[:10] if len(value) >= 10 else value
-    except Exception:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def _notion_stage(method: str, path: str) -> str:
+    """Metrics span for a call: reads (GET, database queries) are lookups, the rest writes."""
+    if method == "GET" or path.endswith("/query"):
+        return "notion_lookup"
+    return "notion_write"
+
+
+def _idempotent(method: str, path: str) -> bool:
+    """Whether a call is safe to resend after an unknown outcome: all but creates (POSTs other than queries)."""
+    return method != "POST" or path.endswith("/query")
+
+
+def _retry_error(error: Exception, idempotent: bool) -> bool:
+    # A create may already be stored when a read times out or the connection drops:
+    # it is only resent when the connection was never established
+    return idempotent or isinstance(error, requests.ConnectTimeout)
+
+
+def notion_request(method: str, path: str, **kwargs: Any) -> requests.Response:
+    """
+    Send a rate-limited request to the Notion API and return the successful response.
+    429 responses wait for Retry-After; 5xx and connection errors retry with jittered backoff,
+    except for creates, which only retry 429 and connect timeouts (never a duplicate page).
+    Raises requests.HTTPError once retries are exhausted or on other 4xx errors.
+    Time spent (including throttling and retries) is added to the notion_lookup/notion_write spans.
+    """
+    with metrics.span(_notion_stage(method, path)):
+        return _notion_request(method, path, **kwargs)
+
+
+def _notion_request(method: str, path: str, **kwargs: Any) -> requests.Response:
+    idempotent = _idempotent(method, path)
+    for attempt in range(MAX_RETRIES + 1):
+        CONFIG.rate_limiter.acquire()
+        try:
+            # Retries are handled here (429/Retry-After aware), so the pooled session must not retry
+            session = get_session("notion", retries=0)
+            r = session.request(method, f"{CONFIG.base_url}{path}", headers=notion_headers(), **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= MAX_RETRIES or not _retry_error(e, idempotent):
+                raise
+            metrics.incr("http_retries", reason="connection")
+            time.sleep(_backoff_delay(attempt))
+            continue
+        if attempt < MAX_RETRIES:
+            if r.status_code == 429:
+                metrics.incr("http_retries", reason="429")
+                delay = _retry_after(r)
+                time.sleep(delay if delay is not None else _backoff_delay(attempt))
+                continue
+            if r.status_code >= 500 and idempotent:
+                metrics.incr("http_retries", reason="5xx")
+                time.sleep(_backoff_delay(attempt))
+                continue
+        r.raise_for_status()
+        return r
+    raise RuntimeError("unreachable")
+
+
+def run_concurrently(tasks: List[Callable[[], Any]], concurrency: int) -> List[Any]:
+    """
+    Run callables on a bounded thread pool and return their results in order.
+    The first failure cancels pending tasks and is re-raised.
+    """
+    if concurrency <= 1 or len(tasks) <= 1:
+        return [t() for t in tasks]
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [pool.submit(t) for t in tasks]
+        return [f.result() for f in futures]
+    except BaseException:
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+
+
+def to_iso_date(value: Any) -> Optional[str]:
+    """YYYY-MM-DD for Notion date properties (epoch ms or ISO-like strings); None when empty."""
+    if not value:
         return None
+    return to_date_str(value)
 
 
 def normalize_tag_names(value: Any) -> List[str]:
@@ -98,35 +219,14 @@ def normalize_tag_names(value: Any) -> List[str]:
     return out
 
 
-def _normalize_url(url: str) -> str:
-    """Lowercase scheme/host, strip query/fragment, trim trailing slash."""
-    if not url:
-        return ""
-    try:
-        parts = urlsplit(str(url).strip())
-        scheme = (parts.scheme or "https").lower()
-        netloc = (parts.netloc or "").lower()
-        path = (parts.path or "").rstrip("/")
-        return f"{scheme}://{netloc}{path}"
-    except Exception:
-        text = str(url).strip().lower()
-        text = text.split("?", 1)[0].split("#", 1)[0]
-        return text.rstrip("/")
-
 def find_page_by_url(event_url: str) -> Optional[dict]:
     """Return the first page (full object) where Event URL equals the normalized URL."""
-    norm = _normalize_url(event_url)
+    norm = normalize_url(event_url)
     payload = {
         "filter": {"property": "URL", "url": {"equals": norm}},
         "page_size": 1,
     }
-    r = requests.post(
-        f"{NOTION_BASE_URL}/databases/{NOTION_DATABASE_ID}/query",
-        headers=notion_headers(),
-        json=payload,
-        timeout=30,
-    )
-    r.raise_for_status()
+    r = notion_request("POST", f"/databases/{CONFIG.database_id}/query", json=payload)
     results = r.json().get("results", [])
     if not results:
         return None
@@ -158,61 +258,269 @@ def find_pages_by_name_and_start(name: str, start_iso: Optional[str]) -> List[di
         },
         "page_size": 25,
     }
-    r = requests.post(
-        f"{NOTION_BASE_URL}/databases/{NOTION_DATABASE_ID}/query",
-        headers=notion_headers(),
-        json=payload,
-        timeout=30,
-    )
-    r.raise_for_status()
+    r = notion_request("POST", f"/databases/{CONFIG.database_id}/query", json=payload)
     return r.json().get("results", [])
 
-def list_all_pages_with_url() -> List[Dict[str, str]]:
+def _page_source(page: dict) -> Optional[str]:
+    """Return the [CFP] Source name of a page (select or status), if any."""
+    try:
+        props = page.get("properties", {}) or {}
+        src_prop = (props.get("[CFP] Source", {}) or {})
+        return (src_prop.get("select", {}) or {}).get("name") or (src_prop.get("status", {}) or {}).get("name")
+    except Exception:
+        return None
+
+
+def _page_url(page: dict) -> str:
+    try:
+        return (page.get("properties", {}) or {}).get("URL", {}).get("url") or ""
+    except Exception:
+        return ""
+
+
+def _page_title(page: dict) -> str:
+    try:
+        title = (page.get("properties", {}) or {}).get("Name", {}).get("title") or []
+        return "".join((t.get("plain_text") or (t.get("text") or {}).get("content") or "") for t in title)
+    except Exception:
+        return ""
+
+
+def _page_date_start(page: dict) -> Optional[str]:
+    try:
+        date = (page.get("properties", {}) or {}).get("Date", {}).get("date") or {}
+        start = date.get("start")
+        return start[:10] if start else None
+    except Exception:
+        return None
+
+
+def _filter_params(properties: Optional[List[str]]) -> Optional[List[Tuple[str, str]]]:
+    """Query params limiting returned page properties to these names (filter_properties)."""
+    if not properties:
+        return None
+    db_props = get_database_properties()
+    ids = [db_props[name]["id"] for name in properties if (db_props.get(name) or {}).get("id")]
+    return [("filter_properties", pid) for pid in ids] or None
+
+
+def iter_database_pages(
+    payload: Optional[Dict[str, Any]] = None,
+    properties: Optional[List[str]] = None,
+) -> Iterator[dict]:
     """
-    Return a list of dicts: { 'page_id': str, 'url_key': str }
+    Yield every page of the database, following Notion's cursor pagination.
+    An optional payload (filter/sorts) is sent with each query; `properties` limits the
+    returned page properties to those names (via filter_properties).
     """
-    pages: List[Dict[str, str]] = []
-    payload: Dict[str, Any] = {"page_size": 100}
+    payload = dict(payload or {})
+    payload["page_size"] = 100
+    params = _filter_params(properties)
     while True:
-        r = requests.post(
-            f"{NOTION_BASE_URL}/databases/{NOTION_DATABASE_ID}/query",
-            headers=notion_headers(),
-            json=payload,
-            timeout=30,
-        )
-        r.raise_for_status()
+        r = notion_request("POST", f"/databases/{CONFIG.database_id}/query", json=payload, params=params)
         data = r.json()
         for p in data.get("results", []):
-            props = p.get("properties", {})
-            # Only include developers.events rows
-            try:
-                src_prop = (props.get("[CFP] Source", {}) or {})
-                src_name = (src_prop.get("select", {}) or {}).get("name") or (src_prop.get("status", {}) or {}).get("name")
-                if src_name != "developers.events":
-                    continue
-            except Exception:
-                continue
-            url_val = ""
-            try:
-                url_val = props.get("URL", {}).get("url") or ""
-            except Exception:
-                url_val = ""
-            pages.append({"page_id": p["id"], "url_key": _normalize_url(url_val)})
+            yield p
         if data.get("has_more") and data.get("next_cursor"):
             payload["start_cursor"] = data["next_cursor"]
         else:
             break
+
+
+def _page_status(page: dict) -> Optional[str]:
+    try:
+        st_prop = (page.get("properties", {}) or {}).get("[CFP] Status", {}) or {}
+        return (st_prop.get("status", {}) or {}).get("name") or (st_prop.get("select", {}) or {}).get("name")
+    except Exception:
+        return None
+
+
+def _source_filter(skip_closed: bool) -> Optional[Dict[str, Any]]:
+    """
+    Server-side filter for developers.events rows (and, with skip_closed, [CFP] Status != Closed).
+    Returns None when the schema does not allow it; callers still filter client-side.
+    """
+    try:
+        src_type = property_type("[CFP] Source")
+        st_type = property_type("[CFP] Status")
+    except Exception:
+        return None
+    clauses: List[Dict[str, Any]] = []
+    if src_type in ("select", "status"):
+        clauses.append({"property": "[CFP] Source", src_type: {"equals": "developers.events"}})
+    if skip_closed and st_type in ("select", "status"):
+        clauses.append({"property": "[CFP] Status", st_type: {"does_not_equal": "Closed"}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"and": clauses}
+
+
+# Properties fetched when listing pages for reconcile
+LISTING_PROPERTIES = ["URL", "[CFP] Source", "[CFP] Status"]
+
+
+def list_all_pages_with_url(skip_closed: bool = False) -> List[Dict[str, str]]:
+    """
+    Return a list of dicts: { 'page_id': str, 'url_key': str }
+    Only developers.events rows are returned (filtered by Notion when the schema allows),
+    with just the properties needed to decide; skip_closed also drops rows already Closed.
+    """
+    pages: List[Dict[str, str]] = []
+    for p in iter_database_pages(_listing_payload(skip_closed), properties=LISTING_PROPERTIES):
+        listed = _listed_page(p, skip_closed)
+        if listed:
+            pages.append(listed)
     return pages
 
+
+def _listing_payload(skip_closed: bool) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {}
+    server_filter = _source_filter(skip_closed)
+    if server_filter:
+        payload["filter"] = server_filter
+    return payload
+
+
+def _listed_page(p: dict, skip_closed: bool) -> Optional[Dict[str, str]]:
+    """{'page_id', 'url_key'} of a developers.events page, or None when it is filtered out."""
+    # Only include developers.events rows
+    if _page_source(p) != "developers.events":
+        return None
+    if skip_closed and _page_status(p) == "Closed":
+        return None
+    return {"page_id": p["id"], "url_key": normalize_url(_page_url(p))}
+
+
+class PageIndex:
+    """
+    In-memory snapshot of the Notion database, built with a single paginated scan.
+    Mirrors the lookups done by find_page_by_url / find_pages_by_name_and_start
+    so upserts can be resolved without one query per event.
+    """
+
+    def __init__(self) -> None:
+        self.by_id: Dict[str, dict] = {}
+        self.by_url: Dict[str, dict] = {}
+        self.by_name_start: Dict[Tuple[str, str], List[dict]] = {}
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def add(self, page: dict) -> None:
+        with self.lock:
+            self._add(page)
+
+    def _add(self, page: dict) -> None:
+        self.size += 1
+        self.by_id[page["id"]] = page
+        # Same rule as find_page_by_url: only developers.events rows match by URL
+        url_key = normalize_url(_page_url(page))
+        if url_key and _page_source(page) == "developers.events":
+            self.by_url.setdefault(url_key, page)
+        name = _page_title(page)
+        start = _page_date_start(page)
+        if name and start:
+            self.by_name_start.setdefault((name, start), []).append(page)
+
+    def find_by_url(self, event_url: str) -> Optional[dict]:
+        return self.by_url.get(normalize_url(event_url))
+
+    def find_by_name_and_start(self, name: str, start_iso: Optional[str]) -> List[dict]:
+        if not name or not start_iso:
+            return []
+        return list(self.by_name_start.get((name, start_iso[:10]), []))
+
+
+def build_page_index(rps: Optional[float] = None) -> PageIndex:
+    """
+    Page through the whole database once and index it by URL and (Name, Date.start).
+    With rps, the shared limiter is (re)configured first, as in upsert_events.
+    """
+    if rps is not None:
+        configure_rate_limit(rps)
+    index = PageIndex()
+    for p in iter_database_pages():
+        index.add(p)
+    return index
+
+def get_page(page_id: str) -> Optional[dict]:
+    """Return a live (non-archived) page by id, or None if it no longer exists."""
+    try:
+        r = notion_request("GET", f"/pages/{page_id}")
+    except requests.HTTPError as e:
+        if getattr(e.response, "status_code", None) in (400, 404):
+            return None
+        raise
+    page = r.json()
+    return None if page.get("archived") else page
+
+
 def get_database() -> Dict[str, Any]:
-    r = requests.get(
-        f"{NOTION_BASE_URL}/databases/{NOTION_DATABASE_ID}",
-        headers=notion_headers(),
-        timeout=30,
-    )
-    r.raise_for_status()
+    r = notion_request("GET", f"/databases/{CONFIG.database_id}")
     return r.json()
 
+def _load_schema_file() -> Optional[Dict[str, Any]]:
+    """Return cached properties from the --schema-cache file if present, fresh and for this database."""
+    if not CONFIG.schema_cache_path or not os.path.exists(CONFIG.schema_cache_path):
+        return None
+    try:
+        with open(CONFIG.schema_cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("database_id") != CONFIG.database_id:
+            return None
+        if time.time() - float(cached.get("fetched_at", 0)) > CONFIG.schema_cache_ttl:
+            return None
+        props = cached.get("properties")
+        return props if isinstance(props, dict) else None
+    except Exception:
+        return None
+
+
+def _save_schema_file(props: Dict[str, Any]) -> None:
+    if not CONFIG.schema_cache_path:
+        return
+    try:
+        os.makedirs(os.path.dirname(CONFIG.schema_cache_path) or ".", exist_ok=True)
+        with open(CONFIG.schema_cache_path, "w", encoding="utf-8") as f:
+            json.dump({"database_id": CONFIG.database_id, "fetched_at": time.time(), "properties": props}, f)
+    except Exception:
+        # The disk cache is best effort; the in-process cache still applies
+        pass
+
+
+def get_database_properties(refresh: bool = False) -> Dict[str, Any]:
+    """
+    Return the database properties schema, fetched at most once per process.
+    Falls back to the on-disk cache (if configured and not expired) before calling Notion.
+    """
+    with CONFIG.schema_lock:
+        if CONFIG.db_properties is not None and not refresh:
+            return CONFIG.db_properties
+        props = None if refresh else _load_schema_file()
+        if CONFIG.schema_cache_path and not refresh:
+            metrics.incr("cache_hits" if props is not None else "cache_misses", cache="schema")
+        if props is None:
+            props = get_database().get("properties", {}) or {}
+            _save_schema_file(props)
+        CONFIG.db_properties = props
+        return props
+
+
+def invalidate_schema_cache() -> None:
+    """Drop the in-process and on-disk schema so the next read refetches it."""
+    CONFIG.db_properties = None
+    if CONFIG.schema_cache_path and os.path.exists(CONFIG.schema_cache_path):
+        try:
+            os.remove(CONFIG.schema_cache_path)
+        except OSError:
+            pass
+
+
+def property_type(name: str) -> Optional[str]:
+    """Resolved Notion type of a database property (e.g. 'multi_select', 'status'), or None if absent."""
+    prop = get_database_properties().get(name)
+    return prop.get("type") if isinstance(prop, dict) else None
+
+
 def ensure_schema(verbose: bool = True) -> None:
     """
     Ensure required properties exist:
@@ -220,8 +528,7 @@ def ensure_schema(verbose: bool = True) -> None:
       - Source CFP Status (select) with 'Closed'
       - Active (checkbox)
     """
-    db = get_database()
-    props = db.get("properties", {}) or {}
+    props = get_database_properties(refresh=True)
     wanted: Dict[str, Any] = {}
     if "Source CFP Status" not in props:
         wanted["Source CFP Status"] = {"select": {"options": [{"name": "Closed", "color": "red"}]}}
@@ -233,13 +540,8 @@ def ensure_schema(verbose: bool = True) -> None:
         return
     if verbose:
         print(f"Adding missing properties to database: {', '.join(wanted.keys())}")
-    r = requests.patch(
-        f"{NOTION_BASE_URL}/databases/{NOTION_DATABASE_ID}",
-        headers=notion_headers(),
-        json={"properties": wanted},
-        timeout=30,
-    )
-    r.raise_for_status()
+    notion_request("PATCH", f"/databases/{CONFIG.database_id}", json={"properties": wanted})
+    invalidate_schema_cache()
     if verbose:
         print("Schema update complete.")
 
@@ -253,7 +555,7 @@ def build_properties(ev: Dict[str, Any]) -> Dict[str, Any]:
     source_tags = normalize_tag_names(ev.get("source_tags"))
     properties: Dict[str, Any] = {
         "Name": {"title": [{"text": {"content": name}}]},
-        "URL": {"url": _normalize_url(ev.get("hyperlink") or "") or None},
+        "URL": {"url": normalize_url(ev.get("hyperlink") or "") or None},
         "CFP URL": {"url": ev.get("cfp_url") or None},
         "CFP Dates": {"date": {"start": to_iso_date(ev.get("cfp_close"))}},
         "Date": {
@@ -267,10 +569,8 @@ def build_properties(ev: Dict[str, Any]) -> Dict[str, Any]:
     }
     # Technology property: support multi_select or rich_text; otherwise skip
     try:
-        db_props = get_database().get("properties", {}) or {}
-        tech_prop = db_props.get("Technology")
-        if isinstance(tech_prop, dict):
-            ptype = tech_prop.get("type")
+        ptype = property_type("Technology")
+        if ptype:
             if ptype == "multi_select":
                 properties["Technology"] = {"multi_select": [{"name": t} for t in source_tags]}
             elif ptype == "rich_text":
@@ -281,38 +581,39 @@ def build_properties(ev: Dict[str, Any]) -> Dict[str, Any]:
     return properties
 
 
-def create_page(ev: Dict[str, Any], dry_run: bool = False) -> None:
+def build_create_body(ev: Dict[str, Any]) -> Dict[str, Any]:
+    """POST /pages body for a new event page, with the default workflow properties."""
     body = {
-        "parent": {"database_id": NOTION_DATABASE_ID},
+        "parent": {"database_id": CONFIG.database_id},
         "properties": build_properties(ev),
     }
     # Default workflow properties for new pages from developers.events
     try:
-        db_props = get_database().get("properties", {}) or {}
+        db_props = get_database_properties()
     except Exception:
         db_props = {}
     if "[CFP] Status" in db_props:
-        st_type = (db_props.get("[CFP] Status") or {}).get("type")
+        st_type = property_type("[CFP] Status")
         if st_type == "status":
             body["properties"]["[CFP] Status"] = {"status": {"name": "Open"}}
         elif st_type == "select":
             body["properties"]["[CFP] Status"] = {"select": {"name": "Open"}}
     if "[CFP] Source" in db_props:
-        src_type = (db_props.get("[CFP] Source") or {}).get("type")
+        src_type = property_type("[CFP] Source")
         if src_type == "select":
             body["properties"]["[CFP] Source"] = {"select": {"name": "developers.events"}}
         elif src_type == "status":
             body["properties"]["[CFP] Source"] = {"status": {"name": "developers.events"}}
+    return body
+
+
+def create_page(ev: Dict[str, Any], dry_run: bool = False) -> Optional[dict]:
+    body = build_create_body(ev)
     if dry_run:
-        print(f"[DRY-RUN] CREATE: {ev.get('name')} ({_normalize_url(ev.get('hyperlink') or '')})")
-        return
-    r = requests.post(
-        f"{NOTION_BASE_URL}/pages",
-        headers=notion_headers(),
-        json=body,
-        timeout=30,
-    )
-    r.raise_for_status()
+        print(f"[DRY-RUN] CREATE: {ev.get('name')} ({normalize_url(ev.get('hyperlink') or '')})")
+        return None
+    r = notion_request("POST", "/pages", json=body)
+    return r.json()
 
 
 def _merge_multi_select(existing: List[Dict[str, Any]], incoming_names: List[str]) -> List[Dict[str, str]]:
@@ -334,24 +635,24 @@ def _merge_multi_select(existing: List[Dict[str, Any]], incoming_names: List[str
             seen[key] = nn
     return [{"name": v} for v in seen.values()]
 
-def update_page(page_id: str, ev: Dict[str, Any], dry_run: bool = False, existing_page: Optional[dict] = None) -> None:
+def build_update_properties(ev: Dict[str, Any], existing_page: Optional[dict] = None) -> Dict[str, Any]:
     """
-    Update only the allowed fields:
+    Source-driven properties written on update:
       - CFP Dates (single date from ev['cfp_close'])
+      - URL (normalized event URL, which changes when the source moves the event)
       - CFP URL (url)
       - Technology (multi-select) → merge (preserve existing + add new)
-    Do not touch other properties to preserve manual edits.
     """
     props: Dict[str, Any] = {}
     # CFP Dates
     props["CFP Dates"] = {"date": {"start": to_iso_date(ev.get("cfp_close"))}}
+    # Event URL
+    props["URL"] = {"url": normalize_url(ev.get("hyperlink") or "") or None}
     # CFP URL
     props["CFP URL"] = {"url": ev.get("cfp_url") or None}
     # Technology update: only if property is multi_select; skip if rich_text to avoid overwrite/type errors
     try:
-        db_props = get_database().get("properties", {}) or {}
-        tech_prop = db_props.get("Technology")
-        if isinstance(tech_prop, dict) and tech_prop.get("type") == "multi_select":
+        if property_type("Technology") == "multi_select":
             incoming = normalize_tag_names(ev.get("source_tags"))
             existing = []
             if isinstance(existing_page, dict):
@@ -359,23 +660,80 @@ def update_page(page_id: str, ev: Dict[str, Any], dry_run: bool = False, existin
             props["Technology"] = {"multi_select": _merge_multi_select(existing, incoming)}
     except Exception:
         pass
+    return props
 
-    body = {"properties": props}
-    if dry_run:
-        print(f"[DRY-RUN] UPDATE: {ev.get('name')} ({_normalize_url(ev.get('hyperlink') or '')})")
-        return
-    r = requests.patch(f"{NOTION_BASE_URL}/pages/{page_id}", headers=notion_headers(), json=body, timeout=30)
-    r.raise_for_status()
 
-def mark_page_closed(page_id: str, dry_run: bool = False) -> None:
+def _canonical_property(value: Any) -> Any:
     """
-    Mark page as Closed in the CFP Status select.
+    Reduce a property value (as sent in a request or returned on a page) to a
+    comparable form, ignoring ids, annotations and ordering of multi-select options.
     """
+    if not isinstance(value, dict):
+        return None
+    if "title" in value or "rich_text" in value:
+        parts = value.get("title") or value.get("rich_text") or []
+        return "".join((t.get("plain_text") or (t.get("text") or {}).get("content") or "") for t in parts)
+    if "url" in value:
+        return value.get("url") or None
+    if "date" in value:
+        date = value.get("date") or {}
+        if not date.get("start"):
+            return None
+        return [date.get("start"), date.get("end")]
+    if "multi_select" in value:
+        return sorted((o.get("name") or "") for o in (value.get("multi_select") or []))
+    for key in ("select", "status"):
+        if key in value:
+            return (value.get(key) or {}).get("name")
+    for key in ("checkbox", "number", "email", "phone_number"):
+        if key in value:
+            return value.get(key)
+    return None
+
+
+def properties_fingerprint(props: Dict[str, Any]) -> str:
+    """Stable hash of a set of properties in canonical form."""
+    canonical = {name: _canonical_property(value) for name, value in props.items()}
+    blob = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def page_has_properties(page: dict, props: Dict[str, Any]) -> bool:
+    """True when the page already holds exactly these property values."""
+    page_props = page.get("properties", {}) or {}
+    current = {name: page_props.get(name) for name in props}
+    return properties_fingerprint(current) == properties_fingerprint(props)
+
+
+def build_update_body(ev: Dict[str, Any], existing_page: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+    """PATCH body for an existing page, or None when the page already holds these values."""
+    props = build_update_properties(ev, existing_page)
+    if isinstance(existing_page, dict) and page_has_properties(existing_page, props):
+        return None
+    return {"properties": props}
+
+
+def update_page(page_id: str, ev: Dict[str, Any], dry_run: bool = False, existing_page: Optional[dict] = None) -> bool:
+    """
+    Update only the allowed fields (see build_update_properties).
+    Do not touch other properties to preserve manual edits.
+    Skips the PATCH when the existing page already holds the same values;
+    returns True if an update was sent (or would be, in dry-run).
+    """
+    body = build_update_body(ev, existing_page)
+    if body is None:
+        return False
+    if dry_run:
+        print(f"[DRY-RUN] UPDATE: {ev.get('name')} ({normalize_url(ev.get('hyperlink') or '')})")
+        return True
+    notion_request("PATCH", f"/pages/{page_id}", json=body)
+    return True
+
+def build_closed_body() -> Dict[str, Any]:
+    """PATCH body setting [CFP] Status to Closed (status or select, per the schema)."""
     # Detect property type and set accordingly
     try:
-        db_props = get_database().get("properties", {}) or {}
-        st = db_props.get("[CFP] Status") or {}
-        ptype = st.get("type")
+        ptype = property_type("[CFP] Status")
         if ptype == "status":
             body = {"properties": {"[CFP] Status": {"status": {"name": "Closed"}}}}
         elif ptype == "select":
@@ -384,131 +742,291 @@ def mark_page_closed(page_id: str, dry_run: bool = False) -> None:
             body = {}
     except Exception:
         body = {"properties": {"[CFP] Status": {"status": {"name": "Closed"}}}}
+    return body
+
+
+def mark_page_closed(page_id: str, dry_run: bool = False) -> None:
+    """
+    Mark page as Closed in the CFP Status select.
+    """
+    body = build_closed_body()
     if dry_run:
         print(f"[DRY-RUN] MARK CLOSED: {page_id}")
         return
-    r = requests.patch(
-        f"{NOTION_BASE_URL}/pages/{page_id}",
-        headers=notion_headers(),
-        json=body,
-        timeout=30,
-    )
-    r.raise_for_status()
+    notion_request("PATCH", f"/pages/{page_id}", json=body)
 
 def archive_page(page_id: str, dry_run: bool = False) -> None:
     if dry_run:
         print(f"[DRY-RUN] ARCHIVE MISSING: {page_id}")
         return
-    r = requests.patch(
-        f"{NOTION_BASE_URL}/pages/{page_id}",
-        headers=notion_headers(),
-        json={"archived": True},
-        timeout=30,
-    )
-    r.raise_for_status()
+    notion_request("PATCH", f"/pages/{page_id}", json={"archived": True})
 
 
-def upsert_events(events: List[Dict[str, Any]], limit: Optional[int], dry_run: bool, rps: float) -> Dict[str, Any]:
-    rate_delay = 1.0 / max(rps, 0.1)
-    created = 0
-    updated = 0
-    processed = 0
-    created_items: List[Dict[str, str]] = []
-    updated_items: List[Dict[str, str]] = []
+def _ledger_page(page_id: str, index: Optional[PageIndex]) -> Optional[dict]:
+    """Resolve a page remembered by the ledger, from the snapshot or with a single GET."""
+    if index is not None:
+        return index.by_id.get(page_id)
+    return get_page(page_id)
 
-    for ev in events:
-        if limit is not None and processed >= limit:
-            break
-        processed += 1
-        url_key = _normalize_url(ev.get("hyperlink") or "")
-        if not url_key:
-            print(f"Skipping event without Event URL: {ev.get('name')}")
-            continue
+
+def _plan_upsert(
+    ev: Dict[str, Any],
+    index: Optional[PageIndex],
+    ledger: Optional[SyncLedger] = None,
+    full_sync: bool = False,
+    merge_map: Optional[dedup.MergeMap] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Decide what to do for a single event without writing anything. Returns None when the
+    event is skipped, else a plan: summary 'row', 'skip' (unchanged per the ledger), the
+    'page' to update (None: create one) and the duplicate pages to 'close' as
+    [(page_id, reason, detail)].
+    Lookups use the snapshot index when given, otherwise live queries.
+    Events whose payload hash matches the ledger are skipped without any lookup, unless the
+    snapshot shows their ledger page no longer exists.
+    Pages of duplicates folded into this event (merge map aliases) are reused when the event
+    has no page of its own, and closed otherwise.
+    """
+    url_key = normalize_url(ev.get("hyperlink") or "")
+    if not url_key:
+        print(f"Skipping event without Event URL: {ev.get('name')}")
+        return None
+    row = {
+        "name": ev.get("name") or "",
+        "url": url_key,
+        "cfp": to_iso_date(ev.get("cfp_close")) or "",
+    }
+    external_id = ev.get("external_id") or ""
+    entry = ledger.get(external_id) if ledger is not None and external_id else None
+    # external_ids of duplicates folded into this event: their ledger pages are this event's pages
+    alias_ids = merge_map.aliases_of(external_id) if merge_map is not None and external_id else []
+    payload_hash = properties_fingerprint(build_properties(ev)) if ledger is not None else ""
+    plan: Dict[str, Any] = {
+        "row": row, "external_id": external_id, "hash": payload_hash, "alias_ids": alias_ids,
+        "skip": False, "page": None, "close": [],
+    }
+    alias_urls = merge_map.alias_urls(url_key) if merge_map is not None else []
+    alias_pages = [p for p in map(index.find_by_url, alias_urls) if p] if index is not None else []
+    open_aliases = [p for p in alias_pages if _page_status(p) != "Closed"]
+    if entry and index is not None and entry.get("page_id") not in index.by_id:
+        # The ledger page was archived or deleted since: look the event up (or recreate it) afresh
+        entry = None
+    if entry and not full_sync and entry.get("hash") == payload_hash and not open_aliases:
+        metrics.incr("cache_hits", cache="sync_ledger")
+        row["page_id"] = entry.get("page_id") or ""
+        plan["skip"] = True
+        return plan
+    if ledger is not None:
+        metrics.incr("cache_misses", cache="sync_ledger")
+    if index is None and alias_urls:
+        alias_pages = [p for p in map(find_page_by_url, alias_urls) if p]
+        open_aliases = [p for p in alias_pages if _page_status(p) != "Closed"]
+
+    candidates: List[dict] = []
+    page = _ledger_page(entry["page_id"], index) if entry and entry.get("page_id") else None
+    if not page and ledger is not None:
+        for alias_entry in filter(None, map(ledger.get, alias_ids)):
+            page = _ledger_page(alias_entry["page_id"], index) if alias_entry.get("page_id") else None
+            if page:
+                break
+    if page:
+        pass
+    elif index is not None:
+        page = index.find_by_url(url_key)
+    else:
         page = find_page_by_url(url_key)
-        # Fallback: if no page found by URL, try to locate by Name + Date.start (URL might have changed)
-        if not page:
-            start_iso = to_iso_date(ev.get("event_start"))
+    # Known URL change (merge map): continue on the page of the folded duplicate
+    if not page and alias_pages:
+        page = (open_aliases or alias_pages)[0]
+    # Fallback: if no page found by URL, try to locate by Name + Date.start (URL might have changed).
+    # With a non-empty merge map the live per-event query is skipped: URL changes are resolved locally.
+    if not page:
+        start_iso = to_iso_date(ev.get("event_start"))
+        if index is not None:
+            candidates = index.find_by_name_and_start(ev.get("name") or "", start_iso)
+        elif not merge_map:
             candidates = find_pages_by_name_and_start(ev.get("name") or "", start_iso)
-            # If any candidate already has the same normalized URL, treat it as the match
-            for cand in candidates:
-                cand_url = ""
-                try:
-                    cand_url = cand.get("properties", {}).get("URL", {}).get("url") or ""
-                except Exception:
-                    cand_url = ""
-                if _normalize_url(cand_url) == url_key:
-                    page = cand
-                    break
-            # If still not found, close duplicates that match name+date but have different URL
-        if not page and candidates:
-            for cand in candidates:
-                cand_props = cand.get("properties", {}) or {}
-                # Skip team-managed or non-developers.events rows
-                try:
-                    src_prop = cand_props.get("[CFP] Source", {}) or {}
-                    src = (src_prop.get("select", {}) or {}).get("name") or (src_prop.get("status", {}) or {}).get("name")
-                except Exception:
-                    src = None
-                # If it's not from developers.events, never touch it
-                if src != "developers.events":
-                    continue
-                # Compare URL after normalization
-                try:
-                    cand_url = cand_props.get("URL", {}).get("url") or ""
-                except Exception:
-                    cand_url = ""
-                if _normalize_url(cand_url) != url_key:
-                    if dry_run:
-                        print(
-                            f"[DRY-RUN] CLOSE DUPLICATE (URL changed): {ev.get('name')} "
-                            f"{_normalize_url(cand_url)} -> {url_key}"
-                        )
-                        time.sleep(rate_delay)
-                    else:
-                        mark_page_closed(cand["id"], dry_run=False)
-                        time.sleep(rate_delay)
-        if page:
-            update_page(page["id"], ev, dry_run=dry_run, existing_page=page)
-            updated += 1
-            updated_items.append({
-                "name": ev.get("name") or "",
-                "url": _normalize_url(ev.get("hyperlink") or ""),
-                "cfp": to_iso_date(ev.get("cfp_close")) or "",
-            })
-        else:
-            create_page(ev, dry_run=dry_run)
-            created += 1
-            created_items.append({
-                "name": ev.get("name") or "",
-                "url": _normalize_url(ev.get("hyperlink") or ""),
-                "cfp": to_iso_date(ev.get("cfp_close")) or "",
-            })
-        time.sleep(rate_delay)
-
-    return {"created": created, "updated": updated, "processed": processed, "created_items": created_items, "updated_items": updated_items}
-
-def reconcile_missing(current_url_keys: set[str], dry_run: bool, rps: float, archive: bool) -> Dict[str, int]:
-    """
-    Find pages in the DB whose External ID is not in current_external_ids and mark them closed
-    or archive them.
-    """
-    rate_delay = 1.0 / max(rps, 0.1)
-    total = 0
-    actions = 0
-    pages = list_all_pages_with_url()
-    for p in pages:
-        total += 1
-        key = p.get("url_key") or ""
-        if not key:
-            continue
-        if key not in current_url_keys:
-            if archive:
-                archive_page(p["page_id"], dry_run=dry_run)
-            else:
-                mark_page_closed(p["page_id"], dry_run=dry_run)
-            actions += 1
-            time.sleep(rate_delay)
-    return {"scanned": total, "affected": actions}
+        # If any candidate already has the same normalized URL, treat it as the match
+        for cand in candidates:
+            if normalize_url(_page_url(cand)) == url_key:
+                page = cand
+                break
+    # If still not found, close duplicates that match name+date but have different URL
+    if not page and candidates:
+        for cand in candidates:
+            # If it's not from developers.events, never touch it
+            if _page_source(cand) != "developers.events":
+                continue
+            # Compare URL after normalization
+            cand_url = _page_url(cand)
+            if normalize_url(cand_url) != url_key:
+                plan["close"].append((cand["id"], "URL changed", f"{ev.get('name')} {normalize_url(cand_url)} -> {url_key}"))
+    for alias in open_aliases:
+        if page is None or alias["id"] != page["id"]:
+            plan["close"].append((alias["id"], "merged", f"{ev.get('name')} {normalize_url(_page_url(alias))} -> {url_key}"))
+    plan["page"] = page
+    return plan
+
+
+def _close_duplicate(reason: str, detail: str, dry_run: bool) -> bool:
+    """Print the dry-run line for a duplicate page; True when it should really be closed."""
+    if dry_run:
+        print(f"[DRY-RUN] CLOSE DUPLICATE ({reason}): {detail}")
+    return not dry_run
+
+
+def _finish_upsert(
+    plan: Dict[str, Any],
+    outcome: str,
+    page: Optional[dict],
+    dry_run: bool,
+    index: Optional[PageIndex],
+    ledger: Optional[SyncLedger],
+) -> Tuple[str, Dict[str, str]]:
+    """Record the page written for a plan (ledger, snapshot) and return the upsert outcome."""
+    external_id = plan["external_id"]
+    if ledger is not None and plan["alias_ids"] and not dry_run:
+        ledger.forget(plan["alias_ids"])
+    if outcome == "created" and index is not None and page:
+        # Keep the snapshot current so repeated URLs in the same run update instead of duplicating
+        index.add(page)
+    if ledger is not None and external_id and page and not dry_run:
+        ledger.record(external_id, page["id"], plan["hash"])
+    plan["row"]["page_id"] = page["id"] if page else ""
+    return outcome, plan["row"]
+
+
+def _upsert_event(
+    ev: Dict[str, Any],
+    dry_run: bool,
+    index: Optional[PageIndex],
+    ledger: Optional[SyncLedger] = None,
+    full_sync: bool = False,
+    merge_map: Optional[dedup.MergeMap] = None,
+) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    Create or update the page for a single event (see _plan_upsert).
+    Returns ('created' | 'updated' | 'unchanged', summary row), or None when the event was skipped.
+    """
+    plan = _plan_upsert(ev, index, ledger, full_sync, merge_map)
+    if plan is None:
+        return None
+    if plan["skip"]:
+        return "unchanged", plan["row"]
+    for page_id, reason, detail in plan["close"]:
+        if _close_duplicate(reason, detail, dry_run):
+            mark_page_closed(page_id, dry_run=False)
+    page = plan["page"]
+    if page:
+        changed = update_page(page["id"], ev, dry_run=dry_run, existing_page=page)
+        return _finish_upsert(plan, "updated" if changed else "unchanged", page, dry_run, index, ledger)
+    new_page = create_page(ev, dry_run=dry_run)
+    return _finish_upsert(plan, "created", new_page, dry_run, index, ledger)
+
+
+def upsert_events(
+    events: List[Dict[str, Any]],
+    limit: Optional[int],
+    dry_run: bool,
+    rps: float,
+    index: Optional[PageIndex] = None,
+    concurrency: int = 1,
+    ledger: Optional[SyncLedger] = None,
+    full_sync: bool = False,
+    merge_map: Optional[dedup.MergeMap] = None,
+) -> Dict[str, Any]:
+    """
+    Create or update one page per event.
+    When an index is given (snapshot mode) all matching is resolved in memory;
+    otherwise each event is looked up with live database queries.
+    With a ledger, events unchanged since the last successful sync are skipped
+    (unless full_sync) and known page ids are reused; progress is checkpointed.
+    Events sharing a URL are handled in order by the same worker so a page created
+    for the first occurrence is updated (not duplicated) by the next.
+    A merge map (see dedup) resolves URL changes locally, replacing the per-event
+    Name + Date query of query mode.
+    """
+    configure_rate_limit(rps)
+    selected = events[:limit] if limit is not None else list(events)
+    outcomes: List[Optional[Tuple[str, Dict[str, str]]]] = [None] * len(selected)
+    groups = _group_by_url(selected)
+
+    def make_task(positions: List[int]) -> Callable[[], None]:
+        def task() -> None:
+            for pos in positions:
+                outcomes[pos] = _upsert_event(selected[pos], dry_run, index, ledger, full_sync, merge_map)
+                if ledger is not None:
+                    ledger.checkpoint()
+        return task
+
+    run_concurrently([make_task(g) for g in groups.values()], concurrency)
+    return _upsert_summary(selected, outcomes)
+
+
+def _group_by_url(events: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Positions of the events sharing each normalized URL, in order."""
+    groups: Dict[str, List[int]] = {}
+    for pos, ev in enumerate(events):
+        groups.setdefault(normalize_url(ev.get("hyperlink") or ""), []).append(pos)
+    return groups
+
+
+def _upsert_summary(
+    selected: List[Dict[str, Any]],
+    outcomes: List[Optional[Tuple[str, Dict[str, str]]]],
+) -> Dict[str, Any]:
+    created_items = [row for o in outcomes if o and o[0] == "created" for row in [o[1]]]
+    updated_items = [row for o in outcomes if o and o[0] == "updated" for row in [o[1]]]
+    return {
+        "created": len(created_items),
+        "updated": len(updated_items),
+        "unchanged": sum(1 for o in outcomes if o and o[0] == "unchanged"),
+        "processed": len(selected),
+        "created_items": created_items,
+        "updated_items": updated_items,
+        "page_ids": {o[1]["page_id"] for o in outcomes if o and o[1].get("page_id")},
+    }
+
+
+def reconcile_missing(
+    current_url_keys: set[str],
+    dry_run: bool,
+    rps: float,
+    archive: bool,
+    concurrency: int = 1,
+    ledger: Optional[SyncLedger] = None,
+    keep_page_ids: Optional[set[str]] = None,
+) -> Dict[str, int]:
+    """
+    Find pages in the DB whose URL is not in current_url_keys and mark them closed or archive
+    them. Pages in keep_page_ids (the pages of current events, by external_id, which may still
+    carry the URL of a folded duplicate) are never touched. Their ledger entries are dropped
+    so a returning event is matched afresh.
+    When marking closed, pages already Closed are excluded by the query itself.
+    """
+    configure_rate_limit(rps)
+    pages = list_all_pages_with_url(skip_closed=not archive)
+    missing = _missing_pages(pages, current_url_keys, keep_page_ids)
+
+    def make_task(page_id: str) -> Callable[[], None]:
+        if archive:
+            return lambda: archive_page(page_id, dry_run=dry_run)
+        return lambda: mark_page_closed(page_id, dry_run=dry_run)
+
+    run_concurrently([make_task(p["page_id"]) for p in missing], concurrency)
+    if ledger is not None and not dry_run:
+        ledger.forget_pages(p["page_id"] for p in missing)
+    return {"scanned": len(pages), "affected": len(missing)}
+
+
+def _missing_pages(
+    pages: List[Dict[str, str]],
+    current_url_keys: set[str],
+    keep_page_ids: Optional[set[str]] = None,
+) -> List[Dict[str, str]]:
+    keep_page_ids = keep_page_ids or set()
+    return [p for p in pages if p.get("url_key") and p["url_key"] not in current_url_keys
+            and p["page_id"] not in keep_page_ids]
 
 
 def main() -> None:
@@ -517,29 +1035,105 @@ def main() -> None:
     parser.add_argument("--limit", type=int, default=None, help="Limit number of events to process")
     parser.add_argument("--dry-run", action="store_true", help="Print intended actions without calling Notion API")
     parser.add_argument("--rps", type=float, default=2.5, help="Requests per second throttle (<= 3 recommended)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Number of parallel Notion workers, all sharing the --rps budget (default: 4, or the HTTP pool size with --async)",
+    )
     parser.add_argument("--reconcile-missing", action="store_true", help="Mark or archive pages not present in the JSON")
     parser.add_argument("--archive-missing", action="store_true", help="When reconciling, archive missing pages instead of marking closed")
     parser.add_argument("--skip-upsert", action="store_true", help="Skip create/update phase; only run reconcile if requested")
+    parser.add_argument(
+        "--lookup",
+        choices=("snapshot", "query"),
+        default="snapshot",
+        help="Match events against a one-time snapshot of the database (default) or query Notion per event",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run the Notion calls on asyncio (scripts.notion_async) with pipelined pagination; implies --lookup snapshot",
+    )
+    parser.add_argument("--schema-cache", default=None, help="Persist the Notion database schema to this JSON file between runs")
+    parser.add_argument("--schema-cache-ttl", type=float, default=3600.0, help="Max age in seconds of the on-disk schema cache")
+    parser.add_argument("--state", default=None, help="Sync ledger path (default: notion_sync_state.json next to --db)")
+    parser.add_argument("--no-state", action="store_true", help="Do not read or write the sync ledger")
+    parser.add_argument("--full-sync", action="store_true", help="Re-check every event even if the ledger says it is unchanged")
     parser.add_argument("--ensure-schema", action="store_true", help="Ensure required Notion properties exist before syncing")
+    parser.add_argument("--no-merge-map", action="store_true", help="Ignore the duplicate merge map written by the merge (<db stem>.merge_map.json)")
+    parser.add_argument("--min-score", type=float, default=None, help="Only upsert events whose relevance score is at least this")
+    parser.add_argument("--metrics", default=None, help="Write stage timings and counters here (.prom/.txt: Prometheus text, else JSON)")
     args = parser.parse_args()
+    if args.use_async and args.lookup == "query":
+        parser.error("--async always matches against the snapshot; drop --lookup query")
 
     require_env()
+    # Before any call: the schema check and the snapshot run at --rps too, not the default
+    configure_rate_limit(args.rps)
+    CONFIG.schema_cache_path = args.schema_cache
+    CONFIG.schema_cache_ttl = args.schema_cache_ttl
     if args.ensure_schema:
         try:
             ensure_schema(verbose=not args.dry_run)
         except requests.HTTPError as e:
             print(f"Schema check/update failed: {getattr(e.response, 'status_code', '?')} {getattr(e.response, 'text', '')}")
             raise
-    events = load_db(args.db)
+    # With --limit only the first N records are read from the DB
+    events = read_db(args.db, limit=args.limit)
     if not isinstance(events, list):
         raise SystemExit(f"Invalid DB content (expected list): {args.db}")
+    to_sync = events
+    if args.min_score is not None:
+        # Reconcile still sees every event, so pages of low-scoring events are left alone
+        to_sync = [e for e in events if relevance.event_score(e) >= args.min_score]
+        print(f"Relevance filter: {len(to_sync)}/{len(events)} events with score >= {args.min_score:g}")
+
+    merge_map: Optional[dedup.MergeMap] = None
+    if not args.no_merge_map:
+        merge_map = dedup.MergeMap.load(dedup.merge_map_path(args.db))
+        if len(merge_map):
+            print(f"Loaded merge map: {len(merge_map)} folded duplicates")
+
+    ledger: Optional[SyncLedger] = None
+    if not args.no_state:
+        ledger = SyncLedger.load(args.state or default_state_path(args.db))
+
+    if args.use_async:
+        from scripts import notion_async
+
+        # The async client has its own limiter; the snapshot must run at --rps as well
+        notion_async.configure_rate_limit(args.rps)
+    if args.concurrency is None:
+        args.concurrency = notion_async.POOL_SIZE if args.use_async else 4
 
     start = datetime.now(timezone.utc)
     print(f"Notion sync started at {start.strftime('%Y-%m-%d %H:%M:%S %Z')}")
 
     try:
-        result = upsert_events(events, limit=args.limit, dry_run=args.dry_run, rps=args.rps)
-        print(f"Upsert complete: processed={result['processed']} created={result['created']} updated={result['updated']}")
+        index: Optional[PageIndex] = None
+        if args.use_async:
+            index = asyncio.run(notion_async.build_page_index())
+        elif args.lookup == "snapshot":
+            index = build_page_index()
+        if index is not None:
+            print(f"Loaded Notion snapshot: pages={index.size} url_keys={len(index.by_url)}")
+        upsert = notion_async.upsert_events if args.use_async else upsert_events
+        result = upsert(
+            to_sync,
+            limit=args.limit,
+            dry_run=args.dry_run,
+            rps=args.rps,
+            index=index,
+            concurrency=args.concurrency,
+            ledger=ledger,
+            full_sync=args.full_sync,
+            merge_map=merge_map,
+        )
+        if args.use_async:
+            result = asyncio.run(result)
+        print(f"Upsert complete: processed={result['processed']} created={result['created']} updated={result['updated']} unchanged={result['unchanged']}")
         # Post-upsert summary tables (created/updated)
         try:
             def ellipsize(text: str, width: int) -> str:
@@ -573,8 +1167,20 @@ def main() -> None:
         if args.reconcile_missing:
             # Respect --limit for reconcile: only consider the first N events when provided
             subset = events[: args.limit] if args.limit is not None else events
-            current_keys = {_normalize_url(e.get("hyperlink") or "") for e in subset if e.get("hyperlink")}
-            rec = reconcile_missing(current_keys, dry_run=args.dry_run, rps=args.rps, archive=args.archive_missing)
+            current_keys = {normalize_url(e.get("hyperlink") or "") for e in subset if e.get("hyperlink")}
+            # Pages known by external_id are kept whatever their URL: pages used by this run
+            # and, for events not upserted (e.g. below --min-score), their ledger pages
+            keep_pages = set(result["page_ids"])
+            if ledger is not None:
+                entries = (ledger.get(e["external_id"]) for e in subset if e.get("external_id"))
+                keep_pages.update(entry["page_id"] for entry in entries if entry and entry.get("page_id"))
+            reconcile = notion_async.reconcile_missing if args.use_async else reconcile_missing
+            rec = reconcile(
+                current_keys, dry_run=args.dry_run, rps=args.rps, archive=args.archive_missing,
+                concurrency=args.concurrency, ledger=ledger, keep_page_ids=keep_pages,
+            )
+            if args.use_async:
+                rec = asyncio.run(rec)
             mode = "archived" if args.archive_missing else "marked closed"
             print(f"Reconcile complete: scanned={rec['scanned']} {mode}={rec['affected']}")
             rec_summary = rec
@@ -584,6 +1190,7 @@ def main() -> None:
             print("\nSummary:")
             print(f"| created: {result['created']}")
             print(f"| updated: {result['updated']}")
+            print(f"| unchanged: {result['unchanged']}")
             print(f"| processed: {result['processed']}")
             if rec_mode is not None:
                 print(f"| scanned: {rec_summary.get('scanned', 0)}")
@@ -597,9 +1204,26 @@ def main() -> None:
     except requests.HTTPError as e:
         print(f"HTTP error: {getattr(e.response, 'status_code', '?')} {getattr(e.response, 'text', '')}")
         raise
+    finally:
+        # Persist progress even on failure so the next run resumes instead of starting over
+        if ledger is not None and not args.dry_run:
+            ledger.save()
+        if args.use_async:
+            notion_async.close()
 
+    print("\nTimings:")
+    for line in metrics.summary_lines():
+        print(line)
     end = datetime.now(timezone.utc)
-    print(f"Notion sync finished at {end.strftime('%Y-%m-%d %H:%M:%S %Z')} (duration: {(end - start).seconds}s)")
+    duration = (end - start).total_seconds()
+    print(f"Notion sync finished at {end.strftime('%Y-%m-%d %H:%M:%S %Z')} (duration: {duration:.1f}s)")
+    if args.metrics:
+        run = {"duration_seconds": round(duration, 3)}
+        run.update({k: result[k] for k in ("processed", "created", "updated", "unchanged")})
+        if rec_mode is not None:
+            run.update(reconcile_scanned=rec_summary["scanned"], reconcile_affected=rec_summary["affected"])
+        metrics.write(args.metrics, "cfp_notion_sync", run)
+        print(f"Metrics written to {args.metrics}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+import os
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+STATE_FILENAME = "notion_sync_state.json"
+
+
+def default_state_path(db_path: str) -> str:
+    """The ledger lives next to the JSON DB it tracks."""
+    return os.path.join(os.path.dirname(db_path) or ".", STATE_FILENAME)
+
+
+class SyncLedger:
+    """
+    Persisted record of what was last pushed to Notion, keyed by external_id:
+      { external_id: { 'page_id': str, 'hash': str, 'synced_at': iso8601 } }
+    Saved atomically (temp file + rename) and checkpointed during a run so an
+    interrupted sync resumes where it stopped.
+    """
+
+    def __init__(self, path: Optional[str], entries: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.lock = threading.Lock()
+        self._pending = 0
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "SyncLedger":
+        if not path or not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("entries") if isinstance(data, dict) else None
+            return cls(path, entries if isinstance(entries, dict) else {})
+        except Exception:
+            # A corrupt ledger only costs a full resync
+            return cls(path)
+
+    def get(self, external_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.entries.get(external_id)
+
+    def record(self, external_id: str, page_id: str, payload_hash: str) -> None:
+        with self.lock:
+            self.entries[external_id] = {
+                "page_id": page_id,
+                "hash": payload_hash,
+                "synced_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._pending += 1
+
+    def forget(self, external_ids: Iterable[str]) -> int:
+        """Drop the entries of the given external_ids (e.g. duplicates folded into another event)."""
+        with self.lock:
+            stale = [k for k in external_ids if k in self.entries]
+            for k in stale:
+                del self.entries[k]
+            self._pending += len(stale)
+        return len(stale)
+
+    def forget_pages(self, page_ids: Iterable[str]) -> int:
+        """Drop entries pointing at the given pages (e.g. after they were closed or archived)."""
+        ids = set(page_ids)
+        with self.lock:
+            stale = [k for k, v in self.entries.items() if v.get("page_id") in ids]
+            for k in stale:
+                del self.entries[k]
+            self._pending += len(stale)
+        return len(stale)
+
+    def checkpoint(self, every: int = 50) -> None:
+        """Save if at least `every` changes are pending."""
+        if self._pending >= every:
+            self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self.lock:
+            if not self._pending and os.path.exists(self.path):
+                return
+            payload = {"entries": dict(sorted(self.entries.items()))}
+            self._pending = 0
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)